@@ -1,46 +1,196 @@
 import json
-from langchain_ollama import ChatOllama
-from langchain_core.messages import AIMessage
+import os
+import time
 import re
+from .choice_matcher import matcher_for
+from .llm_backend import llm_backend, LLMResponse
+from .llm_runtime import llm_runtime, ScanCancelled
+from .llm_tracer import llm_tracer
+from .model_router import model_router, ROUTES
+from .response_cache import response_cache
+from .token_estimate import estimate_tokens
 
-MODEL = "llama3-groq-tool-use"
+SELECTION_NUM_PREDICT = "64"
+# Value of the "choice" key in a schema-constrained selection answer, readable before the JSON object is closed.
+_CONSTRAINED_CHOICE = re.compile(r'"choice"\s*:\s*("(?:[^"\\]|\\.)*")')
 
-def get_explanation(prompt: str) -> str | None:
+def _selection_num_predict() -> int | None:
+    return int(os.getenv("LLM_SELECTION_NUM_PREDICT", SELECTION_NUM_PREDICT)) or None
+
+def _constrained_selection() -> bool:
+    return os.getenv("LLM_CONSTRAINED_SELECTION", "true").lower() in ("1", "true", "yes")
+
+def answer_settings() -> dict:
+    """The settings that change the answers to the same prompt: the routed models and how selections are asked."""
+    return {
+        "models": {route: model_router.model_for(route) for route in ROUTES},
+        "constrained_selection": _constrained_selection(),
+        "selection_num_predict": _selection_num_predict(),
+    }
+
+def _choice_schema(choices: list) -> dict:
+    """JSON schema that only admits one of the choices (or "None") as the answer."""
+    return {
+        "type": "object",
+        "properties": {"choice": {"type": "string", "enum": [*choices, "None"]}},
+        "required": ["choice"],
+    }
+
+def _stream_to_log(token: str):
+    callback = llm_runtime.stream_callback
+    if callback is not None:
+        callback(token)
+
+class _TokenStream:
+    """Passes the tokens of one answer to on_token across retries. A retried attempt usually repeats the text the
+    failed one already streamed, so only what goes beyond it is passed on; an answer that differs starts a new line."""
+
+    def __init__(self, on_token):
+        self.on_token = on_token
+        self.shown = ""
+        self.text = ""
+
+    def attempt(self):
+        self.text = ""
+        return self._receive
+
+    def _receive(self, token: str):
+        self.text += token
+        if self.shown.startswith(self.text):
+            return
+        if self.text.startswith(self.shown):
+            self.on_token(self.text[len(self.shown):])
+        else:
+            self.on_token("\n" + self.text)
+        self.shown = self.text
+
+async def _acomplete(route: str, prompt: str, description: str, model: str | None = None, format: str | None = None,
+                     parse=None, **options):
+    """Answers prompt with the model routed for this call kind (or the given one), using the response cache.
+    With parse, the parsed answer is returned and only answers that parse are cached."""
+    # Cache hits never reach llm_runtime.call, so a cancelled scan has to be stopped here as well.
+    llm_runtime.check_cancelled()
+    parse = parse or (lambda content: content)
+    model = model or model_router.model_for(route)
+    on_token = options.pop("on_token", None)
+    cached = response_cache.get(model, format, prompt, options)
+    if cached is not None:
+        _trace(route, model, prompt, cached, None, 0.0, cache_hit=True)
+        result = parse(cached)
+        if on_token is not None:
+            on_token(cached)
+        return result
+    print(f"INFO: Calling LLM for {description}...")
+    stream = _TokenStream(on_token) if on_token is not None else None
+    start = time.perf_counter()
+    try:
+        response: LLMResponse = await llm_runtime.call(
+            lambda: llm_backend.ainvoke(prompt, model=model, format=format,
+                                        on_token=stream.attempt() if stream else None, **options),
+            f"{route.capitalize()} call")
+    except Exception as e:
+        _trace(route, model, prompt, None, None, time.perf_counter() - start, cache_hit=False, error=repr(e))
+        raise
+    latency = time.perf_counter() - start
+    model_router.record_latency(route, model, latency)
+    _trace(route, model, prompt, response.content, getattr(response, "response_metadata", None), latency, cache_hit=False)
+    result = parse(response.content)
+    response_cache.put(model, format, prompt, response.content, options)
+    return result
+
+def _trace(route, model, prompt, content, metadata, latency, cache_hit, error=None):
+    # Ollama reports token counts and durations (in nanoseconds) in the metadata of the final response chunk;
+    # they are missing for cache hits and for streams stopped early.
+    metadata = metadata or {}
+    llm_tracer.record(
+        route=route,
+        model=model,
+        cache_hit=cache_hit,
+        prompt_chars=len(prompt),
+        prompt_tokens_estimate=estimate_tokens(prompt),
+        prompt_eval_count=metadata.get("prompt_eval_count"),
+        response_chars=len(content or ""),
+        eval_count=metadata.get("eval_count"),
+        prompt_eval_s=(metadata.get("prompt_eval_duration") or 0) / 1e9,
+        eval_s=(metadata.get("eval_duration") or 0) / 1e9,
+        load_s=(metadata.get("load_duration") or 0) / 1e9,
+        latency_s=latency,
+        error=error,
+    )
+
+async def aget_explanation(prompt: str) -> str | None:
     try:
-        llm = ChatOllama(model=MODEL)
-        print("INFO: Calling LLM for explanation...")
-        response: AIMessage = llm.invoke(prompt)
-        return response.content
+        on_token = _stream_to_log if llm_runtime.stream_callback is not None else None
+        content = await _acomplete("explanation", prompt, "explanation", on_token=on_token)
+        if on_token is not None:
+            on_token("\n")
+        return content
+    except ScanCancelled:
+        raise
     except Exception as e:
         print(f"An error occurred in get_explanation: {e}")
         return None
 
-def select_stereotype_from_explanation(prompt: str, choices: list) -> str | None:
+async def _aselect(prompt: str, choices: list, model: str | None = None) -> str | None:
+    if not _constrained_selection():
+        content = await _acomplete("selection", prompt, "selection", model=model, num_predict=_selection_num_predict(),
+                                   stop_when=lambda text: _is_settled_selection(text, choices))
+        return _extract_first_match(content, choices)
+    # Ollama restricts generation to the schema, so the model can only name a valid choice. Generation stops once the
+    # value is complete, which also skips the whitespace models tend to emit after a JSON object.
+    content = await _acomplete("selection", prompt, "selection", model=model, format=_choice_schema(choices),
+                               num_predict=_selection_num_predict(),
+                               stop_when=lambda text: _CONSTRAINED_CHOICE.search(text) is not None)
+    match = _CONSTRAINED_CHOICE.search(content)
+    if match:
+        choice = json.loads(match.group(1))
+        if choice in choices or choice == "None":
+            return choice
+    return _extract_first_match(content, choices)
+
+async def aselect_stereotype_from_explanation(prompt: str, choices: list) -> str | None:
     try:
-        llm = ChatOllama(model=MODEL)
-        print("INFO: Calling LLM for selection...")
-        response: AIMessage = llm.invoke(prompt)
-        cleaned_output = _extract_first_match(response.content, choices)
+        cleaned_output = await _aselect(prompt, choices)
+        if model_router.should_check_agreement("selection"):
+            reference = await _aselect(prompt, choices, model=model_router.default_model)
+            model_router.record_agreement("selection", model_router.model_for("selection"), reference == cleaned_output)
         return cleaned_output
+    except ScanCancelled:
+        raise
     except Exception as e:
         print(f"An error occurred in select_stereotype_from_explanation: {e}")
         return None
 
-def get_structured_annotations(prompt: str) -> dict | None:
+async def aget_structured_annotations(prompt: str) -> dict | None:
     try:
-        llm = ChatOllama(model=MODEL, format="json")
-        print("INFO: Calling LLM for structured data extraction (JSON)...")
-        response: AIMessage = llm.invoke(prompt)
-        return json.loads(response.content)
+        return await _acomplete("structured", prompt, "structured data extraction (JSON)", format="json", parse=json.loads)
+    except ScanCancelled:
+        raise
     except Exception as e:
         print(f"An error occurred in get_structured_annotations: {e}")
         return None
 
+# Blocking entry points used by the orchestrator's worker threads; they run the async variants on the shared runtime loop.
+def get_explanation(prompt: str) -> str | None:
+    return llm_runtime.run(aget_explanation(prompt))
+
+def select_stereotype_from_explanation(prompt: str, choices: list) -> str | None:
+    return llm_runtime.run(aselect_stereotype_from_explanation(prompt, choices))
+
+def get_structured_annotations(prompt: str) -> dict | None:
+    return llm_runtime.run(aget_structured_annotations(prompt))
+
+def _is_settled_selection(text: str, choices: list[str]) -> bool:
+    """True once a streamed selection answer names a complete choice, or starts with "None"."""
+    matcher = matcher_for(tuple(choices))
+    if matcher.search(text)[0] is not None:
+        return matcher.is_settled(text)
+    return re.match(r"[\s'\"`*]*none\W", text, re.IGNORECASE) is not None
+
 def _extract_first_match(text: str, choices: list[str]) -> str | None:
-    pattern = r"\b(" + "|".join(re.escape(choice) for choice in choices) + r")\b"
-    match = re.search(pattern, text)
-    if match:
-        return match.group(1)
+    _, choice = matcher_for(tuple(choices)).search(text)
+    if choice is not None:
+        return choice
     if "none" in text.lower():
         return "None"
-    return None
\ No newline at end of file
+    return None
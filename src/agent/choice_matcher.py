@@ -0,0 +1,66 @@
+import re
+from functools import lru_cache
+
+# Words of a choice name may be separated by underscores or whitespace in a model's answer ("api gateway").
+SEPARATOR = r"[_\s]+"
+_SEPARATOR_RE = re.compile(SEPARATOR)
+
+def normalize(text: str) -> str:
+    return _SEPARATOR_RE.sub("_", text.strip().lower())
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a word trie. Longer continuations are tried before stopping at a shorter choice, and every
+    position only walks the trie, so a search stays linear in the length of the text."""
+    words = sorted((word for word in node if word), key=len, reverse=True)
+    branches = [re.escape(word) + _continuation(node[word]) for word in words]
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+def _continuation(node: dict) -> str:
+    children = {w: c for w, c in node.items() if w}
+    if not children:
+        return ""
+    continuation = SEPARATOR + _trie_pattern(children)
+    # "" marks the end of a choice: the continuation is optional there, and greedy, so the longest choice wins.
+    return f"(?:{continuation})?" if "" in node else continuation
+
+class ChoiceMatcher:
+    """Finds the first choice named in a model's answer, case- and separator-insensitively, preferring the
+    longest choice at a position (so "api" never shadows "api_gateway")."""
+
+    def __init__(self, choices: tuple):
+        self.choices = choices
+        self._canonical = {}
+        trie = {}
+        for choice in choices:
+            key = normalize(choice)
+            self._canonical.setdefault(key, choice)
+            node = trie
+            for word in key.split("_"):
+                node = node.setdefault(word, {})
+            node[""] = {}
+        self._longer = {key: [other for other in self._canonical if len(other) > len(key) and other.startswith(key)]
+                        for key in self._canonical}
+        # The trie holds lower-case words and is searched in lower-cased text, which is about twice as fast as IGNORECASE.
+        self._regex = re.compile(r"\b(" + _trie_pattern(trie) + r")\b") if trie else None
+
+    def search(self, text: str):
+        """Returns (match, choice) for the first choice named in text, or (None, None). The match is over text.lower()."""
+        match = self._regex.search(text.lower()) if self._regex else None
+        if match is None:
+            return None, None
+        return match, self._canonical[normalize(match.group(1))]
+
+    def is_settled(self, text: str) -> bool:
+        """True when appending more text can no longer change which choice search() finds first."""
+        match, choice = self.search(text)
+        if match is None:
+            return False
+        text = text.lower()
+        if match.end() == len(text):
+            return False
+        rest = normalize(text[match.start():])
+        return not any(longer.startswith(rest) for longer in self._longer[normalize(choice)])
+
+@lru_cache(maxsize=256)
+def matcher_for(choices: tuple) -> ChoiceMatcher:
+    return ChoiceMatcher(choices)
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+from .llm_backend import LLMBackend
+
+KEEP_ALIVE = "30m"
+
+class ClientPool(LLMBackend):
+    """The Ollama backend. Shares one ChatOllama client (and its keep-alive HTTP session) per (model, format) for the
+    whole process. All clients use the same keep_alive and context size, so Ollama keeps one loaded model for every
+    call kind and can reuse the evaluated prompt prefix between consecutive calls instead of reloading the model."""
+
+    def __init__(self, keep_alive=None, num_ctx=None, base_url=None):
+        super().__init__()
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.base_url = base_url
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def get(self, model: str, format: str | dict | None = None, num_predict: int | None = None) -> tuple["ChatOllama", bool]:
+        # Imported here so that the offline backends work without langchain installed.
+        from langchain_ollama import ChatOllama
+        # A JSON schema format is a dict; it is keyed by its canonical JSON text.
+        format_key = json.dumps(format, sort_keys=True) if isinstance(format, dict) else format
+        key = (model, format_key, num_predict)
+        with self._lock:
+            llm = self._clients.get(key)
+            if llm is not None:
+                return llm, True
+            kwargs = {"model": model, "keep_alive": self.keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", KEEP_ALIVE)}
+            num_ctx = self.num_ctx or int(os.getenv("OLLAMA_NUM_CTX", "0"))
+            if num_ctx:
+                kwargs["num_ctx"] = num_ctx
+            # Scan workers may each use their own Ollama server.
+            base_url = self.base_url or os.getenv("OLLAMA_HOST")
+            if base_url:
+                kwargs["base_url"] = base_url
+            if format:
+                kwargs["format"] = format
+            if num_predict:
+                kwargs["num_predict"] = num_predict
+            llm = ChatOllama(**kwargs)
+            self._clients[key] = llm
+            return llm, False
+
+    def invoke(self, prompt: str, model: str, format: str | dict | None = None):
+        llm, reused = self.get(model, format)
+        start = time.perf_counter()
+        try:
+            return llm.invoke(prompt)
+        finally:
+            self._record(model, format, reused, time.perf_counter() - start)
+
+    async def ainvoke(self, prompt: str, model: str, format: str | dict | None = None, on_token=None,
+                      num_predict: int | None = None, stop_when=None):
+        """Async variant; with on_token or stop_when the response is streamed. Every token is passed to on_token as
+        it arrives, and generation is aborted as soon as stop_when(text so far) is true."""
+        llm, reused = self.get(model, format, num_predict)
+        start = time.perf_counter()
+        try:
+            if on_token is None and stop_when is None:
+                return await llm.ainvoke(prompt)
+            response = None
+            stream = llm.astream(prompt)
+            try:
+                async for chunk in stream:
+                    if on_token is not None:
+                        on_token(chunk.content)
+                    response = chunk if response is None else response + chunk
+                    if stop_when is not None and stop_when(response.content):
+                        break
+            finally:
+                # Closing the stream drops the connection, which makes Ollama stop generating.
+                await stream.aclose()
+            return response
+        finally:
+            self._record(model, format, reused, time.perf_counter() - start)
+
+client_pool = ClientPool()
@@ -0,0 +1,252 @@
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from .response_cache import ResponseCache
+
+DEFAULT_BACKEND = "ollama"
+DEFAULT_STUB_LATENCY = "0.05"
+DEFAULT_STUB_LINKS = "2"
+DEFAULT_REPLAY_SPEED = "1"
+# Streamed answers of the offline backends are cut into words with their trailing whitespace.
+_PIECE = re.compile(r"\s*\S+\s*")
+
+class LLMResponse:
+    """A complete answer: its text and the metadata (token counts, durations in nanoseconds) of the call,
+    with the same attribute names as a langchain AIMessage."""
+
+    def __init__(self, content, response_metadata=None):
+        self.content = content
+        self.response_metadata = response_metadata or {}
+
+class LLMBackend(abc.ABC):
+    """Answers the agent's prompts. Subclasses implement ainvoke (and invoke for the blocking benchmarks) with the
+    signature of ClientPool.ainvoke and report every call to _record for the statistics logged after a scan."""
+
+    client_count = 0
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.calls = []
+
+    @abc.abstractmethod
+    async def ainvoke(self, prompt: str, model: str, format: str | dict | None = None, on_token=None,
+                      num_predict: int | None = None, stop_when=None):
+        """Answers prompt and returns an LLMResponse (or a langchain AIMessage)."""
+
+    def invoke(self, prompt: str, model: str, format: str | dict | None = None):
+        return asyncio.run(self.ainvoke(prompt, model, format))
+
+    def _record(self, model, format, reused, latency):
+        with self._stats_lock:
+            self.calls.append({"model": model, "format": format, "reused": reused, "latency": latency})
+
+    def summary(self) -> dict:
+        with self._stats_lock:
+            calls = list(self.calls)
+        total_latency = sum(c["latency"] for c in calls)
+        return {
+            "clients": self.client_count,
+            "calls": len(calls),
+            "reused_calls": sum(1 for c in calls if c["reused"]),
+            "total_latency": total_latency,
+            "avg_latency": total_latency / len(calls) if calls else 0.0,
+        }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.calls = []
+
+async def stream_text(content, on_token=None, num_predict=None, stop_when=None):
+    """Emits content word by word like a streamed model answer. Returns the text produced before num_predict words
+    or stop_when ended the answer."""
+    if on_token is None and stop_when is None and not num_predict:
+        return content
+    text = ""
+    for index, piece in enumerate(_PIECE.findall(content)):
+        if num_predict and index >= num_predict:
+            break
+        if on_token is not None:
+            on_token(piece)
+        text += piece
+        if stop_when is not None and stop_when(text):
+            break
+        await asyncio.sleep(0)
+    return text
+
+class StubBackend(LLMBackend):
+    """Synthetic offline backend: every call takes `latency` seconds and gets a deterministic answer derived from
+    the prompt. Constrained selections pick one of the allowed values, link discovery links each source to the first
+    `links` potential targets with the first listed connector type, and other JSON prompts get an empty object, which
+    makes the scan fall back to its per-category prompts. Meant to measure the scan's own overhead, not its results."""
+
+    def __init__(self, latency=None, links=None):
+        super().__init__()
+        self.latency = float(os.getenv("LLM_STUB_LATENCY", DEFAULT_STUB_LATENCY)) if latency is None else latency
+        self.links = int(os.getenv("LLM_STUB_LINKS", DEFAULT_STUB_LINKS)) if links is None else links
+
+    async def ainvoke(self, prompt: str, model: str, format: str | dict | None = None, on_token=None,
+                      num_predict: int | None = None, stop_when=None):
+        start = time.perf_counter()
+        try:
+            await asyncio.sleep(self.latency)
+            content = await stream_text(self.answer(prompt, format), on_token, num_predict, stop_when)
+            return LLMResponse(content, {
+                "prompt_eval_count": len(prompt) // 4,
+                "eval_count": len(_PIECE.findall(content)),
+                "eval_duration": int(self.latency * 1e9),
+            })
+        finally:
+            self._record(model, format, False, time.perf_counter() - start)
+
+    def answer(self, prompt, format):
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        if isinstance(format, dict):
+            choices = format.get("properties", {}).get("choice", {}).get("enum")
+            if choices:
+                return json.dumps({"choice": choices[digest % len(choices)]})
+            return "{}"
+        if format == "json":
+            targets = re.search(r"\*\*Potential Target Components:\*\*\s*(\[.*?\])", prompt)
+            connectors = re.search(r"\*\*Available Generic Connectors:\*\*\s*- ([\w-]+):", prompt)
+            if targets and connectors:
+                names = re.findall(r"'([^']+)'", targets.group(1))[:self.links]
+                return json.dumps({"links": [
+                    {"target_component": name, "connector_types": [connectors.group(1)]} for name in names
+                ]})
+            return "{}"
+        return f"Synthetic answer {digest % 10000:04d}: the files give no clear evidence for any of the listed options."
+
+class ReplayBackend(LLMBackend):
+    """Answers from a trace captured by RecordingBackend (LLM_RECORD_PATH), keyed like the response cache by model,
+    format, prompt and num_predict, and waits the recorded latency divided by `speed` (0 answers at once). Prompts that are not in
+    the trace are answered by `fallback` and counted in `misses`."""
+
+    def __init__(self, path, speed=None, fallback=None):
+        super().__init__()
+        self.path = path
+        self.speed = float(os.getenv("LLM_REPLAY_SPEED", DEFAULT_REPLAY_SPEED)) if speed is None else speed
+        self.fallback = fallback or StubBackend(latency=0.0)
+        self.misses = 0
+        self._entries = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+
+    async def ainvoke(self, prompt: str, model: str, format: str | dict | None = None, on_token=None,
+                      num_predict: int | None = None, stop_when=None):
+        entry = self._entries.get(ResponseCache.make_key(model, format, prompt, {"num_predict": num_predict}))
+        if entry is None:
+            self.misses += 1
+            return await self.fallback.ainvoke(prompt, model, format, on_token, num_predict, stop_when)
+        start = time.perf_counter()
+        try:
+            if self.speed > 0:
+                await asyncio.sleep(entry["latency_s"] / self.speed)
+            # The recorded answer already ends where the recorded stream was stopped.
+            content = await stream_text(entry["content"], on_token)
+            return LLMResponse(content, entry["response_metadata"])
+        finally:
+            self._record(model, format, False, time.perf_counter() - start)
+
+    def summary(self) -> dict:
+        return {**super().summary(), "replay_misses": self.misses}
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.misses = 0
+
+class RecordingBackend(LLMBackend):
+    """Passes calls to `inner` and appends every answer to a JSON-lines trace that ReplayBackend can serve."""
+
+    def __init__(self, inner, path):
+        super().__init__()
+        self.inner = inner
+        self.path = path
+        self._file_lock = threading.Lock()
+
+    @property
+    def client_count(self):
+        return self.inner.client_count
+
+    async def ainvoke(self, prompt: str, model: str, format: str | dict | None = None, on_token=None,
+                      num_predict: int | None = None, stop_when=None):
+        start = time.perf_counter()
+        response = await self.inner.ainvoke(prompt, model, format, on_token, num_predict, stop_when)
+        entry = {
+            "key": ResponseCache.make_key(model, format, prompt, {"num_predict": num_predict}),
+            "model": model,
+            "content": response.content,
+            "response_metadata": getattr(response, "response_metadata", None) or {},
+            "latency_s": time.perf_counter() - start,
+        }
+        with self._file_lock:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return response
+
+    def summary(self) -> dict:
+        return self.inner.summary()
+
+    def reset_stats(self):
+        self.inner.reset_stats()
+
+class BackendSelector:
+    """The process-wide backend used by the agent. LLM_BACKEND (ollama, stub or replay, with LLM_REPLAY_PATH) and
+    LLM_RECORD_PATH are read on first use, so .env is honoured; use() replaces the backend, e.g. in a benchmark."""
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> LLMBackend:
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._from_env()
+            return self._backend
+
+    @staticmethod
+    def _from_env():
+        name = os.getenv("LLM_BACKEND", DEFAULT_BACKEND).lower()
+        if name == "ollama":
+            from .client_pool import client_pool
+            backend = client_pool
+        elif name == "stub":
+            backend = StubBackend()
+        elif name == "replay":
+            path = os.getenv("LLM_REPLAY_PATH")
+            if not path:
+                raise ValueError("LLM_BACKEND=replay needs LLM_REPLAY_PATH.")
+            backend = ReplayBackend(path)
+        else:
+            raise ValueError(f"Unknown LLM_BACKEND '{name}'. Use ollama, stub or replay.")
+        record_path = os.getenv("LLM_RECORD_PATH")
+        return RecordingBackend(backend, record_path) if record_path else backend
+
+    def use(self, backend):
+        with self._lock:
+            self._backend = backend
+
+    async def ainvoke(self, *args, **kwargs):
+        return await self.backend.ainvoke(*args, **kwargs)
+
+    def invoke(self, *args, **kwargs):
+        return self.backend.invoke(*args, **kwargs)
+
+    def summary(self) -> dict:
+        return self.backend.summary()
+
+    def reset_stats(self):
+        self.backend.reset_stats()
+
+llm_backend = BackendSelector()
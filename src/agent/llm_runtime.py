@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_TIMEOUT = "300"
+DEFAULT_RETRIES = "2"
+DEFAULT_BACKOFF = "2"
+CANCEL_POLL_INTERVAL = 0.2
+
+async def _in_context(values, coroutine):
+    # Runs inside the task's own context copy, so setting the variables does not leak into the loop thread.
+    for variable, value in values:
+        variable.set(value)
+    return await coroutine
+
+class ScanCancelled(Exception):
+    """Raised inside LLM calls once the running scan has been cancelled."""
+
+class LLMRuntime:
+    """Runs all async LLM calls on one background event loop, so pooled async clients stay bound to a single
+    loop, and applies per-call timeouts, retries with exponential backoff and cooperative cancellation."""
+
+    def __init__(self):
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.stream_callback = None
+        self.call_slots = None
+        self._slot_executor = None
+
+    @property
+    def timeout(self):
+        return float(os.getenv("LLM_TIMEOUT", DEFAULT_TIMEOUT))
+
+    @property
+    def retries(self):
+        return int(os.getenv("LLM_RETRIES", DEFAULT_RETRIES))
+
+    @property
+    def backoff(self):
+        return float(os.getenv("LLM_BACKOFF", DEFAULT_BACKOFF))
+
+    def _get_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-runtime", daemon=True).start()
+            return self._loop
+
+    def _get_slot_executor(self):
+        with self._loop_lock:
+            if self._slot_executor is None:
+                self._slot_executor = ThreadPoolExecutor(thread_name_prefix="llm-slots")
+            return self._slot_executor
+
+    def run(self, coroutine):
+        """Runs a coroutine on the runtime loop and blocks the calling thread until it finishes.
+        The coroutine sees the caller's context variables (e.g. the trace context of the scan unit)."""
+        values = list(contextvars.copy_context().items())
+        return asyncio.run_coroutine_threadsafe(_in_context(values, coroutine), self._get_loop()).result()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def reset(self):
+        self._cancelled.clear()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise ScanCancelled("The scan was cancelled.")
+
+    async def _wait_for_cancel(self):
+        while not self._cancelled.is_set():
+            await asyncio.sleep(CANCEL_POLL_INTERVAL)
+
+    async def _cancellable(self, coroutine, timeout):
+        call = asyncio.ensure_future(coroutine)
+        watcher = asyncio.ensure_future(self._wait_for_cancel())
+        try:
+            done, _ = await asyncio.wait([call, watcher], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watcher.cancel()
+        if call in done:
+            return call.result()
+        call.cancel()
+        self.check_cancelled()
+        raise asyncio.TimeoutError(f"LLM call did not finish within {timeout:g}s")
+
+    def set_call_slots(self, slots):
+        """Shares a semaphore (e.g. a multiprocessing.Semaphore) that every LLM call must hold while it runs,
+        to cap the calls in flight across several scans or processes. None removes the cap."""
+        self.call_slots = slots
+
+    async def _attempt(self, make_coroutine):
+        slots = self.call_slots
+        if slots is None:
+            return await self._cancellable(make_coroutine(), self.timeout)
+        # The semaphore may be shared with other processes, so it is acquired in a worker thread.
+        acquired = self._get_slot_executor().submit(slots.acquire)
+        try:
+            await self._cancellable(asyncio.wrap_future(acquired), None)
+        except BaseException:
+            # A slot that is only acquired after the wait was abandoned still has to be given back.
+            acquired.add_done_callback(lambda future: None if future.cancelled() else slots.release())
+            raise
+        try:
+            return await self._cancellable(make_coroutine(), self.timeout)
+        finally:
+            slots.release()
+
+    async def call(self, make_coroutine, description="LLM call"):
+        """Awaits make_coroutine() with the configured timeout, retrying failed attempts with backoff."""
+        attempts = self.retries + 1
+        for attempt in range(1, attempts + 1):
+            self.check_cancelled()
+            try:
+                return await self._attempt(make_coroutine)
+            except ScanCancelled:
+                raise
+            except Exception as e:
+                if attempt == attempts:
+                    raise
+                delay = self.backoff * (2 ** (attempt - 1))
+                print(f"WARNING: {description} failed (attempt {attempt}/{attempts}): {e!r}. Retrying in {delay:g}s...")
+                await self._cancellable(asyncio.sleep(delay), None)
+
+llm_runtime = LLMRuntime()
@@ -0,0 +1,54 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+
+_trace_context = contextvars.ContextVar("llm_trace_context", default={})
+
+class LLMTracer:
+    """Collects one record per agent call (cache hits included), labelled with the scan context the call was made
+    in: stage, component, category and link target. The context lives in a ContextVar, so it follows asyncio tasks;
+    bind() carries it into worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    @contextmanager
+    def context(self, **fields):
+        token = _trace_context.set({**_trace_context.get(), **fields})
+        try:
+            yield
+        finally:
+            _trace_context.reset(token)
+
+    def current(self) -> dict:
+        return dict(_trace_context.get())
+
+    def bind(self, fn, **fields):
+        """Wraps fn so that it runs in the current trace context plus fields, in whichever thread calls it."""
+        captured = {**_trace_context.get(), **fields}
+
+        def run(*args, **kwargs):
+            with self.context(**captured):
+                return fn(*args, **kwargs)
+        return run
+
+    def record(self, **fields):
+        entry = {"stage": None, "component": None, "category": None, "target": None, **self.current(), **fields}
+        with self._lock:
+            self.records.append(entry)
+
+    def extend(self, records):
+        """Adds records traced elsewhere, e.g. by a scan worker process."""
+        with self._lock:
+            self.records.extend(records)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return list(self.records)
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+llm_tracer = LLMTracer()
@@ -0,0 +1,72 @@
+import os
+import random
+import threading
+
+DEFAULT_MODEL = "llama3-groq-tool-use"
+ROUTES = ("explanation", "selection", "structured")
+
+class ModelRouter:
+    """Maps each kind of LLM call to a model. LLM_MODEL sets the model of every route and LLM_MODEL_<ROUTE>
+    (e.g. LLM_MODEL_SELECTION) overrides a single one, so small classification prompts can go to a faster model.
+    Records the latency of every routed call and, for a sample of selections answered by a model other than
+    the default one, whether the default model agrees, to help tune the mapping."""
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def default_model(self):
+        return os.getenv("LLM_MODEL") or DEFAULT_MODEL
+
+    @property
+    def agreement_sample(self):
+        return float(os.getenv("LLM_ROUTE_AGREEMENT_SAMPLE", "0"))
+
+    def model_for(self, route: str) -> str:
+        if route not in ROUTES:
+            raise ValueError(f"Unknown LLM route '{route}'.")
+        return os.getenv(f"LLM_MODEL_{route.upper()}") or self.default_model
+
+    def should_check_agreement(self, route: str) -> bool:
+        """True when this call's answer should also be compared with the default model's answer."""
+        if self.model_for(route) == self.default_model:
+            return False
+        return random.random() < self.agreement_sample
+
+    def _route_stats(self, route, model):
+        return self._routes.setdefault((route, model), {"calls": 0, "total_latency": 0.0, "compared": 0, "agreed": 0})
+
+    def record_latency(self, route: str, model: str, latency: float):
+        with self._stats_lock:
+            stats = self._route_stats(route, model)
+            stats["calls"] += 1
+            stats["total_latency"] += latency
+
+    def record_agreement(self, route: str, model: str, agreed: bool):
+        with self._stats_lock:
+            stats = self._route_stats(route, model)
+            stats["compared"] += 1
+            stats["agreed"] += int(agreed)
+
+    def summary(self) -> list[dict]:
+        """One entry per (route, model) that made calls: calls, avg_latency and, if sampled, the agreement rate."""
+        with self._stats_lock:
+            routes = {key: dict(stats) for key, stats in self._routes.items()}
+        rows = []
+        for (route, model), stats in routes.items():
+            rows.append({
+                "route": route,
+                "model": model,
+                "calls": stats["calls"],
+                "avg_latency": stats["total_latency"] / stats["calls"] if stats["calls"] else 0.0,
+                "compared": stats["compared"],
+                "agreement": stats["agreed"] / stats["compared"] if stats["compared"] else None,
+            })
+        return rows
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._routes = {}
+
+model_router = ModelRouter()
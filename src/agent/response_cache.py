@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "output/llm_cache.sqlite"
+DEFAULT_CACHE_MAX_MB = "200"
+
+class ResponseCache:
+    """Persistent LLM response cache keyed by hash(model, format, prompt, generation options) with LRU eviction by
+    total size."""
+
+    def __init__(self, path=None, max_bytes=None):
+        # Unset values are read from LLM_CACHE_PATH / LLM_CACHE_MAX_MB on first use, so .env is honoured.
+        self._path = path
+        self._max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._size = 0
+
+    @property
+    def path(self):
+        if self._path is None:
+            self._path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        return self._path
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            self._max_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)) * 1024 * 1024)
+        return self._max_bytes
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            # The headless CLI scans projects in parallel processes that share this file.
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, format, prompt: str, options: dict | None = None) -> str:
+        """Options are the generation options of the call (e.g. num_predict); callbacks and unset values are
+        ignored, so a call without options keeps the key it had before options were part of it."""
+        fmt = json.dumps(format, sort_keys=True) if format is not None else ""
+        parts = [model, fmt, prompt]
+        options = {name: value for name, value in (options or {}).items() if value is not None and not callable(value)}
+        if options:
+            parts.append(json.dumps(options, sort_keys=True))
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, model: str, format, prompt: str, options: dict | None = None) -> str | None:
+        if not self.enabled:
+            return None
+        key = self.make_key(model, format, prompt, options)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model: str, format, prompt: str, response: str, options: dict | None = None):
+        if not self.enabled or response is None:
+            return
+        key = self.make_key(model, format, prompt, options)
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time())
+            )
+            self._size += size - (old[0] if old else 0)
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        while self._size > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY last_used LIMIT 100").fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for key, size in rows:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                if self._size <= self.max_bytes:
+                    return
+
+    def summary(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size_bytes": self._size}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+response_cache = ResponseCache()
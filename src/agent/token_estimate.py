@@ -0,0 +1,5 @@
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt or file for budgeting, at CHARS_PER_TOKEN characters per token."""
+    return len(text) // CHARS_PER_TOKEN + 1
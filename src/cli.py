@@ -0,0 +1,145 @@
+"""
+Headless entry point: scans one or many projects without the GUI, e.g. in a nightly job.
+
+Usage (from the root directory of this repository):
+
+    python -m src.cli <project_path> [<project_path> ...] [options]
+
+Each project is scanned in its own worker process, then its Python model is generated and its metrics are
+calculated from a model built in memory from discovered_components.json. All outputs of a project (discovered_components.json and its fingerprints, checkpoint and call
+profile, discovered_model.py and stats/*.csv) are written to <output-root>/<project name>/. --llm-concurrency caps
+the LLM calls in flight across all projects. Scan settings that are not given as options are read from .env, as
+in the GUI. The R predictions still read output/stats and are only run by the GUI.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+DEFAULT_OUTPUT_ROOT = "output/projects"
+
+
+def project_output_dirs(project_paths, output_root):
+    """Maps every project path to its own output directory, named after the project folder."""
+    dirs = {}
+    used = set()
+    for project_path in project_paths:
+        name = os.path.basename(os.path.normpath(project_path)) or "project"
+        candidate, suffix = name, 2
+        while candidate in used:
+            candidate, suffix = f"{name}_{suffix}", suffix + 1
+        used.add(candidate)
+        dirs[project_path] = os.path.join(output_root, candidate)
+    return dirs
+
+
+def _init_worker(call_slots):
+    from src.agent.llm_runtime import llm_runtime
+    load_dotenv()
+    llm_runtime.set_call_slots(call_slots)
+
+
+def _write_metrics(json_path, project_path, stats_dir, log):
+    from src.orchestrator.model_loader import load_model_from_json
+    from src.run.calculate_metrics import calculate_all_metrics
+    from src.run.generate_csv import write_csv_all
+    calculate_all_metrics(load_model_from_json(json_path, project_path, log))
+    write_csv_all(stats_dir)
+
+
+def _scan_in_own_process(context, call_slots, *args):
+    """Runs scan_project in a new worker process that exits afterwards."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=(call_slots,)) as executor:
+        return executor.submit(scan_project, *args).result()
+
+
+def scan_project(project_path, output_dir, options, metrics=True):
+    """Runs the scan, model generation and metrics for one project. Returns True if every step succeeded."""
+    from src.orchestrator import model_generator
+    from src.orchestrator.scanner_orchestrator import ScannerOrchestrator, scan_options_from_env
+    prefix = f"[{os.path.basename(output_dir)}]"
+
+    def log(message):
+        for line in str(message).splitlines() or [""]:
+            print(f"{prefix} {line}", flush=True)
+
+    json_path = os.path.join(output_dir, "discovered_components.json")
+    model_path = os.path.join(output_dir, "discovered_model.py")
+    orchestrator = ScannerOrchestrator(project_path, log, output_path=json_path, **{**scan_options_from_env(), **options})
+    if not orchestrator.run_scan():
+        return False
+    model_generator.generate_python_model(json_path=json_path, output_path=model_path,
+                                          project_path=project_path, log_callback=log)
+    if not os.path.exists(model_path):
+        return False
+    if metrics:
+        log("--- STAGE 4: Calculating Metrics ---")
+        try:
+            _write_metrics(json_path, project_path, os.path.join(output_dir, "stats"), log)
+        except Exception as e:
+            log(f"ERROR: Metric calculation failed: {e}")
+            return False
+    return True
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Scan microservice projects without the GUI.")
+    parser.add_argument("projects", nargs="+", help="project folders containing a docker-compose.yaml")
+    parser.add_argument("--output-root", default=DEFAULT_OUTPUT_ROOT,
+                        help=f"directory that receives one output folder per project (default: {DEFAULT_OUTPUT_ROOT})")
+    parser.add_argument("--parallel-projects", type=int, default=1, help="projects scanned at the same time (default: 1)")
+    parser.add_argument("--llm-concurrency", type=int, default=0,
+                        help="LLM calls in flight across all projects; 0 means no global cap (default: 0)")
+    parser.add_argument("--max-concurrency", type=int, help="components analyzed at the same time per project (SCAN_MAX_CONCURRENCY)")
+    parser.add_argument("--task-concurrency", type=int, help="prompts per component at the same time (SCAN_TASK_CONCURRENCY)")
+    parser.add_argument("--job-queue", help="publish the analysis jobs to this queue for src.worker processes (SCAN_JOB_QUEUE)")
+    parser.add_argument("--incremental", action="store_true", help="only re-analyze components changed since the last scan")
+    parser.add_argument("--resume", action="store_true", help="restore units finished by an interrupted scan")
+    parser.add_argument("--no-metrics", action="store_true", help="stop after generating the Python model")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    load_dotenv()
+    args = parse_args(argv)
+    options = {"incremental": args.incremental, "resume": args.resume}
+    if args.max_concurrency is not None:
+        options["max_concurrency"] = args.max_concurrency
+    if args.task_concurrency is not None:
+        options["task_concurrency"] = args.task_concurrency
+    if args.job_queue is not None:
+        options["job_queue_path"] = args.job_queue
+    # The same folder given twice (e.g. "./a a") would be scanned twice at once into the same output directory.
+    projects = list(dict.fromkeys(os.path.abspath(project_path) for project_path in args.projects))
+    if len(projects) < len(args.projects):
+        print(f"INFO: Ignoring {len(args.projects) - len(projects)} duplicate project path(s).", flush=True)
+    output_dirs = project_output_dirs(projects, args.output_root)
+    context = multiprocessing.get_context("spawn")
+    call_slots = context.Semaphore(args.llm_concurrency) if args.llm_concurrency > 0 else None
+    results = {}
+    # One process per project: the LLM statistics, the call trace and the metric values are process-wide, so
+    # projects must not share a process. Each thread waits for the process of one project.
+    with ThreadPoolExecutor(max_workers=max(1, args.parallel_projects)) as executor:
+        futures = {
+            executor.submit(_scan_in_own_process, context, call_slots, project_path, output_dirs[project_path], options,
+                            not args.no_metrics): project_path
+            for project_path in projects
+        }
+        for future in as_completed(futures):
+            project_path = futures[future]
+            try:
+                results[project_path] = future.result()
+            except Exception as e:
+                print(f"ERROR: Scanning '{project_path}' failed: {e}", flush=True)
+                results[project_path] = False
+    print("\n--- SUMMARY ---")
+    for project_path in projects:
+        status = "OK" if results.get(project_path) else "FAILED"
+        print(f"{status:<8}{project_path} -> {output_dirs[project_path]}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -4,18 +4,23 @@ import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext
 import threading
 import queue
-from src.orchestrator.scanner_orchestrator import ScannerOrchestrator
+from src.orchestrator.scanner_orchestrator import ScannerOrchestrator, scan_options_from_env
+from src.agent.llm_runtime import llm_runtime
 from src.gui.editor_window import EditorWindow
-from src.orchestrator import model_generator
+from src.orchestrator import model_generator, model_loader
+from src.run.calculate_metrics import calculate_all_metrics
 from src.run.generate_csv import write_csv_all
 from dotenv import load_dotenv
 
 class ScannerApp(tk.Tk):
     def __init__(self):
         super().__init__()
+        load_dotenv()
         self.title("Microservices Security Scanner")
         self.geometry("800x600")
         self.project_path = tk.StringVar()
+        self.incremental_scan = tk.BooleanVar(value=False)
+        self.resume_scan = tk.BooleanVar(value=False)
         self.log_queue = queue.Queue()
         main_frame = ttk.Frame(self, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -26,8 +31,14 @@ class ScannerApp(tk.Tk):
         self.path_entry.pack(side=tk.LEFT, expand=True, fill=tk.X)
         self.browse_button = ttk.Button(top_frame, text="Browse...", command=self.browse_directory)
         self.browse_button.pack(side=tk.LEFT, padx=(5, 0))
+        self.incremental_check = ttk.Checkbutton(main_frame, text="Incremental scan (only re-analyze changed components)", variable=self.incremental_scan)
+        self.incremental_check.pack(anchor=tk.W, pady=(5, 0))
+        self.resume_check = ttk.Checkbutton(main_frame, text="Resume interrupted scan (skip units finished before the failure)", variable=self.resume_scan)
+        self.resume_check.pack(anchor=tk.W)
         self.scan_button = ttk.Button(main_frame, text="Start Scan", command=self.start_scan)
-        self.scan_button.pack(pady=10, fill=tk.X)
+        self.scan_button.pack(pady=(10, 0), fill=tk.X)
+        self.cancel_button = ttk.Button(main_frame, text="Cancel Scan", command=self.cancel_scan, state="disabled")
+        self.cancel_button.pack(pady=(5, 10), fill=tk.X)
         self.progress_bar = ttk.Progressbar(main_frame, mode='indeterminate')
         self.progress_bar.pack(pady=5, fill=tk.X)
         self.log_area = scrolledtext.ScrolledText(main_frame, wrap=tk.WORD, height=25)
@@ -43,12 +54,17 @@ class ScannerApp(tk.Tk):
     def log(self, message):
         self.log_queue.put(message)
 
+    def log_stream(self, text):
+        # Streamed LLM tokens are appended as they arrive, without a line break after each one.
+        self.log_queue.put((text,))
+
     def process_queue(self):
         try:
             while True:
                 message = self.log_queue.get_nowait()
+                text = message[0] if isinstance(message, tuple) else message + '\n'
                 self.log_area.configure(state='normal')
-                self.log_area.insert(tk.END, message + '\n')
+                self.log_area.insert(tk.END, text)
                 self.log_area.configure(state='disabled')
                 self.log_area.see(tk.END)
         except queue.Empty:
@@ -62,6 +78,7 @@ class ScannerApp(tk.Tk):
             return
         self.scan_button.config(state="disabled")
         self.browse_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
         self.progress_bar.start()
         self.analysis_thread = threading.Thread(
             target=self.run_analysis_thread,
@@ -71,15 +88,32 @@ class ScannerApp(tk.Tk):
 
     def run_analysis_thread(self, path):
         try:
-            orchestrator = ScannerOrchestrator(project_path=path, log_callback=self.log)
+            orchestrator = ScannerOrchestrator(
+                project_path=path,
+                log_callback=self.log,
+                incremental=self.incremental_scan.get(),
+                resume=self.resume_scan.get(),
+                stream_callback=self.log_stream,
+                **scan_options_from_env()
+            )
             orchestrator.run_scan()
         except Exception as e:
             self.log(f"FATAL ERROR: An error occurred during the scan: {e}")
         finally:
             self.after(0, self.scan_finished)
 
+    def cancel_scan(self):
+        self.cancel_button.config(state="disabled")
+        self.log("Cancelling scan, waiting for in-flight LLM calls to stop...")
+        llm_runtime.cancel()
+
     def scan_finished(self):
         self.progress_bar.stop()
+        self.cancel_button.config(state="disabled")
+        if llm_runtime.cancelled:
+            self.scan_button.config(state="normal")
+            self.browse_button.config(state="normal")
+            return
         self.log("✅ Scan and Link Analysis complete. Opening editor window...")
         json_output_path = "output/discovered_components.json"
         editor = EditorWindow(self, json_output_path)
@@ -100,6 +134,7 @@ class ScannerApp(tk.Tk):
                 log_callback=self.log
             )
             self.log(f"--- STAGE 4: Scanning the Model and Running Predictions ---")
+            calculate_all_metrics(model_loader.load_model_from_json(json_output_path, self.project_path.get(), self.log))
             write_csv_all()
             rscript_executable = os.getenv("RSCRIPT_PATH")
             if not rscript_executable:
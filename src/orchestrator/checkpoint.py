@@ -0,0 +1,55 @@
+import json
+import os
+import threading
+
+def checkpoint_path_for(json_path: str) -> str:
+    base, _ = os.path.splitext(json_path)
+    return f"{base}.checkpoint.jsonl"
+
+class ScanCheckpoint:
+    """Append-only journal of finished scan units ("component" and "links" per component).
+    Every entry carries the component's fingerprint, so results are only reused while the inputs are unchanged."""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        self._entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash; everything before it is still valid.
+                        continue
+                    self._entries[(entry["kind"], entry["name"])] = entry
+        except FileNotFoundError:
+            pass
+        return len(self._entries)
+
+    def get(self, kind, name, fingerprint):
+        entry = self._entries.get((kind, name))
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return None
+        return entry["data"]
+
+    def record(self, kind, name, fingerprint, data):
+        entry = {"kind": kind, "name": name, "fingerprint": fingerprint, "data": data}
+        with self._lock:
+            output_dir = os.path.dirname(self.path)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[(kind, name)] = entry
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
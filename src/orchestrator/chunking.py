@@ -0,0 +1,50 @@
+from src.agent.token_estimate import CHARS_PER_TOKEN
+
+FILE_MARKERS = ("\n--- CONTENT OF ", "\n--- ERROR READING ")
+
+def _split_files(text):
+    """Yields the per-file sections of read_multiple output, each starting with its CONTENT/ERROR marker."""
+    start = 0
+    while True:
+        found = [i for i in (text.find(marker, start + 1) for marker in FILE_MARKERS) if i != -1]
+        next_start = min(found) if found else -1
+        if next_start == -1:
+            yield text[start:]
+            return
+        yield text[start:next_start + 1]
+        start = next_start + 1
+
+def _split_lines(section, max_chars):
+    header, _, body = section.partition("\n")
+    piece = []
+    size = 0
+    part = 1
+    for line in body.splitlines(keepends=True):
+        if size + len(line) > max_chars and piece:
+            yield f"{header} (part {part})\n" + "".join(piece)
+            part += 1
+            piece, size = [], 0
+        while len(line) > max_chars:
+            yield f"{header} (part {part})\n" + line[:max_chars]
+            part += 1
+            line = line[max_chars:]
+        piece.append(line)
+        size += len(line)
+    if piece:
+        yield f"{header} (part {part})\n" + "".join(piece)
+
+def iter_chunks(text, max_tokens):
+    """Streams file contents as chunks of at most max_tokens, keeping whole files together where possible."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunk = []
+    size = 0
+    for section in _split_files(text):
+        pieces = [section] if len(section) <= max_chars else _split_lines(section, max_chars)
+        for piece in pieces:
+            if size + len(piece) > max_chars and chunk:
+                yield "".join(chunk)
+                chunk, size = [], 0
+            chunk.append(piece)
+            size += len(piece)
+    if chunk:
+        yield "".join(chunk)
@@ -0,0 +1,119 @@
+import codecs
+import hashlib
+import mmap
+import os
+import threading
+
+MMAP_THRESHOLD = 1024 * 1024
+# Bytes decoded up front to tell a large text file from a binary one.
+SNIFF_BYTES = 64 * 1024
+# UTF-8 needs at most this many bytes per character.
+MAX_CHAR_BYTES = 4
+
+class IngestedFile:
+    """A file's digest and length in characters, and its text if it is smaller than the mmap threshold. Larger
+    files are not kept in memory: read_text decodes only the requested head from disk (length is then the size
+    in bytes, an upper bound of the characters)."""
+    __slots__ = ("path", "text", "digest", "error", "length")
+
+    def __init__(self, path, text=None, digest=None, error=None, length=0):
+        self.path = path
+        self.text = text
+        self.digest = digest
+        self.error = error
+        self.length = len(text) if text is not None else length
+
+    def read_text(self, max_chars=None) -> str | None:
+        """The first max_chars characters (all if None), or None if the file is unreadable or not UTF-8 text."""
+        if self.error is not None:
+            return None
+        if self.text is not None:
+            return self.text if max_chars is None else self.text[:max_chars]
+        if self.length == 0:
+            return ""
+        try:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                end = len(mapped) if max_chars is None else min(len(mapped), max_chars * MAX_CHAR_BYTES)
+                decoder = codecs.getincrementaldecoder('utf-8')()
+                text = decoder.decode(mapped[:end], final=end == len(mapped))
+        except (OSError, ValueError, UnicodeDecodeError):
+            return None
+        return text if max_chars is None else text[:max_chars]
+
+class FileIngestionCache:
+    """Per-scan store of source files. Each file is read from disk once, hashed and decoded in the same pass,
+    and then served to fingerprinting, both analysis stages and every prompt builder. Files from mmap_threshold
+    on are hashed through a memory mapping and only their selected head is decoded, when it is needed."""
+
+    def __init__(self, mmap_threshold=MMAP_THRESHOLD):
+        self.mmap_threshold = mmap_threshold
+        self._files = {}
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def read(self, path) -> IngestedFile:
+        ingested = self._files.get(path)
+        if ingested is None:
+            ingested = self._ingest(path)
+            with self._lock:
+                ingested = self._files.setdefault(path, ingested)
+        return ingested
+
+    def _ingest(self, path):
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size >= self.mmap_threshold:
+                    # Hash straight from the mapping, and only check that the file starts as UTF-8 text.
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        digest = hashlib.sha256(mapped).hexdigest()
+                        _, error = self._decode(mapped[:SNIFF_BYTES], final=False)
+                    return IngestedFile(path, digest=digest, error=error, length=size)
+                data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                text, error = self._decode(data)
+        except OSError as e:
+            return IngestedFile(path, digest=f"unreadable: {e}", error=e)
+        return IngestedFile(path, text=text, digest=digest, error=error)
+
+    @staticmethod
+    def _decode(data, final=True):
+        try:
+            return codecs.getincrementaldecoder('utf-8')().decode(data, final=final), None
+        except UnicodeDecodeError as e:
+            return None, e
+
+    def read_multiple(self, file_paths, char_limits=None) -> str:
+        """Same layout as the read_multiple_files tool, so prompts are unchanged.
+        char_limits optionally maps a path to the number of characters to keep from it."""
+        char_limits = char_limits or {}
+        parts = []
+        for file_path in file_paths:
+            ingested = self.read(file_path)
+            if ingested.error is not None:
+                parts.append(f"--- ERROR READING {file_path}: {ingested.error} ---\n\n")
+                continue
+            limit = char_limits.get(file_path)
+            # One character more than the limit tells whether the file was cut.
+            text = ingested.read_text(None if limit is None else limit + 1)
+            if text is None:
+                parts.append(f"--- ERROR READING {file_path}: not a UTF-8 text file ---\n\n")
+                continue
+            if limit is not None and len(text) > limit:
+                text = text[:limit] + "\n... [truncated]"
+            parts.append(f"--- CONTENT OF {file_path} ---\n{text}\n\n")
+        return "".join(parts)
+
+    def component_contents(self, component_name, selection) -> str:
+        """selection is a list of (path, max_chars) pairs as returned by file_selection.select_files."""
+        contents = self._components.get(component_name)
+        if contents is None:
+            contents = self.read_multiple([path for path, _ in selection], dict(selection))
+            with self._lock:
+                contents = self._components.setdefault(component_name, contents)
+        return contents
+
+    def clear(self):
+        with self._lock:
+            self._files = {}
+            self._components = {}
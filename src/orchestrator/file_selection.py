@@ -0,0 +1,125 @@
+import os
+import re
+from src.agent.token_estimate import CHARS_PER_TOKEN
+
+DEFAULT_TOKEN_BUDGET = 6000
+MAX_CANDIDATES = 2000
+MAX_SCORED_FILE_SIZE = 256 * 1024
+# Larger files are generated or data files; they are never read.
+MAX_FILE_SIZE = 2 * 1024 * 1024
+MIN_TRUNCATED_TOKENS = 200
+
+SKIPPED_DIRECTORIES = {
+    ".git", ".svn", ".hg", ".idea", ".vscode", "node_modules", "bower_components", "vendor", "venv", ".venv",
+    "env", "__pycache__", ".pytest_cache", ".mypy_cache", "target", "build", "dist", "out", "bin", "obj",
+    ".gradle", ".next", ".nuxt", "coverage",
+}
+
+SKIPPED_EXTENSIONS = (
+    ".lock", ".ico", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".bmp", ".pdf", ".zip", ".tar", ".gz",
+    ".tgz", ".jar", ".war", ".class", ".so", ".dll", ".exe", ".bin", ".pyc", ".woff", ".woff2", ".ttf", ".eot",
+    ".mp3", ".mp4", ".map", ".min.js", ".min.css", ".sum", ".db", ".sqlite",
+)
+
+# Data sets, dumps and model weights: large and without security-relevant configuration.
+DATA_EXTENSIONS = (
+    ".csv", ".tsv", ".parquet", ".avro", ".orc", ".feather", ".arrow", ".jsonl", ".ndjson", ".sql", ".dump",
+    ".pt", ".pth", ".onnx", ".h5", ".hdf5", ".pkl", ".pickle", ".npy", ".npz", ".ckpt", ".safetensors",
+)
+
+LOCKFILE_NAMES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "pipfile.lock", "composer.lock",
+    "gemfile.lock", "cargo.lock", "go.sum", "packages.lock.json",
+}
+
+DEPENDENCY_MANIFESTS = {
+    "requirements.txt", "pyproject.toml", "setup.py", "setup.cfg", "pipfile", "package.json", "pom.xml",
+    "build.gradle", "build.gradle.kts", "go.mod", "gemfile", "composer.json", "cargo.toml", "pubspec.yaml",
+}
+
+ENTRYPOINT_NAMES = {
+    "main.py", "app.py", "server.py", "wsgi.py", "asgi.py", "manage.py", "index.js", "server.js", "app.js",
+    "main.js", "index.ts", "server.ts", "main.ts", "app.ts", "main.go", "program.cs", "startup.cs",
+    "application.java", "entrypoint.sh", "docker-entrypoint.sh",
+}
+
+CONFIG_EXTENSIONS = (".yml", ".yaml", ".properties", ".conf", ".ini", ".toml", ".env", ".xml", ".cfg")
+
+SOURCE_EXTENSIONS = (
+    ".py", ".js", ".ts", ".jsx", ".tsx", ".java", ".kt", ".go", ".cs", ".rb", ".php", ".rs", ".scala", ".sh",
+    ".json", ".html",
+)
+
+SECURITY_KEYWORDS = re.compile(
+    r"auth|jwt|oauth|openid|oidc|tls|ssl|https|certificate|password|secret|api[_-]?key|token|csrf|bcrypt|"
+    r"crypt|vault|keycloak|passport|spring-security|pika|amqp|kafka|rabbitmq|nats|grpc|redis|mongo|postgres|mysql",
+    re.IGNORECASE
+)
+
+def _candidate_files(root):
+    candidates = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(d for d in subdirectories if d not in SKIPPED_DIRECTORIES and not d.startswith('.'))
+        for file_name in sorted(files):
+            lower = file_name.lower()
+            if lower in LOCKFILE_NAMES or lower.endswith(SKIPPED_EXTENSIONS) or lower.endswith(DATA_EXTENSIONS):
+                continue
+            path = os.path.join(directory, file_name)
+            try:
+                if os.stat(path).st_size > MAX_FILE_SIZE:
+                    continue
+            except OSError:
+                continue
+            candidates.append(path)
+            if len(candidates) >= MAX_CANDIDATES:
+                return candidates
+    return candidates
+
+def _base_score(relative_path):
+    name = os.path.basename(relative_path).lower()
+    if name == "dockerfile" or name.startswith("dockerfile.") or name.endswith(".dockerfile"):
+        return 100
+    if name in DEPENDENCY_MANIFESTS or name.endswith((".csproj", ".gemspec")):
+        return 90
+    if name in ENTRYPOINT_NAMES:
+        return 60
+    if name.endswith(CONFIG_EXTENSIONS) or name.startswith((".env", "application", "appsettings", "nginx")):
+        return 70
+    if name.endswith(SOURCE_EXTENSIONS):
+        return 20
+    return 5
+
+def score_file(root, path, head):
+    """Scores a file by its path and the security keywords in head, its first MAX_SCORED_FILE_SIZE characters."""
+    relative_path = os.path.relpath(path, root)
+    score = _base_score(relative_path)
+    if head is not None:
+        hits = {m.group(0).lower() for m in SECURITY_KEYWORDS.finditer(head)}
+        score += min(len(hits) * 5, 40)
+    depth = relative_path.count(os.sep)
+    return score - 2 * depth
+
+def select_files(root, ingestion, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Ranks every file in the build context by security relevance and packs the best ones into the token budget.
+    Returns (path, max_chars) pairs in rank order; max_chars is None for files included in full."""
+    scored = []
+    for path in _candidate_files(root):
+        ingested = ingestion.read(path)
+        head = ingested.read_text(MAX_SCORED_FILE_SIZE)
+        if head is None or not head.strip():
+            continue
+        scored.append((-score_file(root, path, head), os.path.relpath(path, root), path, ingested))
+    scored.sort()
+    selection = []
+    remaining = token_budget
+    for _, _, path, ingested in scored:
+        tokens = ingested.length // CHARS_PER_TOKEN + 1
+        if tokens <= remaining:
+            selection.append((path, None))
+            remaining -= tokens
+        elif remaining >= MIN_TRUNCATED_TOKENS:
+            selection.append((path, remaining * CHARS_PER_TOKEN))
+            remaining = 0
+        if remaining < MIN_TRUNCATED_TOKENS:
+            break
+    return selection
@@ -0,0 +1,43 @@
+import hashlib
+import json
+import os
+
+def fingerprint_path_for(json_path: str) -> str:
+    base, _ = os.path.splitext(json_path)
+    return f"{base}.fingerprints.json"
+
+def fingerprint_component(service_info: dict, file_digests: dict, options: dict) -> str:
+    """Hashes a component's compose service block, the digests of the files its analysis reads (keyed by their path
+    relative to the build context, which appears in the prompts) and the options that shape the analysis."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(service_info, sort_keys=True, default=str).encode("utf-8"))
+    for file_path in sorted(file_digests):
+        digest.update(b"\0" + file_path.replace(os.sep, "/").encode("utf-8") + b"\0")
+        digest.update(file_digests[file_path].encode("utf-8"))
+    digest.update(b"\0" + json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def fingerprint_links(component_fingerprint: str, component_list: list, options: dict) -> str:
+    """Link discovery also depends on the set of potential targets and the link options, not only on the source's files."""
+    payload = component_fingerprint + "\0" + "\0".join(sorted(component_list)) + "\0" + json.dumps(options, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_fingerprints(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"components": {}, "links": {}}
+    data.setdefault("components", {})
+    data.setdefault("links", {})
+    return data
+
+def save_fingerprints(path: str, fingerprints: dict, log_callback):
+    try:
+        output_dir = os.path.dirname(path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fingerprints, f, indent=4)
+    except Exception as e:
+        log_callback(f"ERROR: Failed to save component fingerprints: {e}")
@@ -0,0 +1,107 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_LEASE_SECONDS = 120
+
+class JobQueue:
+    """A job queue in a SQLite file shared by a publishing scan and any number of worker processes.
+    A worker claims a job with a lease that it renews while working on it; jobs whose lease expired (e.g. because
+    the worker died) are handed out again. Results are stored as JSON until the publisher has collected them."""
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, scan_id TEXT NOT NULL, kind TEXT NOT NULL, name TEXT NOT NULL, "
+                "payload TEXT NOT NULL, status TEXT NOT NULL, worker TEXT, lease_until REAL, result TEXT, error TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        return self._conn
+
+    def publish(self, scan_id, kind, name, payload) -> int:
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT INTO jobs (scan_id, kind, name, payload, status) VALUES (?, ?, ?, ?, 'pending')",
+                (scan_id, kind, name, json.dumps(payload)),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker) -> dict | None:
+        """Hands the oldest pending (or abandoned) job to worker, or returns None if there is none."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, scan_id, kind, name, payload FROM jobs "
+                    "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE jobs SET status = 'running', worker = ?, lease_until = ? WHERE id = ?",
+                                 (worker, now + self.lease_seconds, row[0]))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"id": row[0], "scan_id": row[1], "kind": row[2], "name": row[3], "payload": json.loads(row[4])}
+
+    def renew(self, job_id, worker):
+        with self._lock:
+            self._connect().execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                                    (time.time() + self.lease_seconds, job_id, worker))
+
+    def complete(self, job_id, worker, result):
+        with self._lock:
+            self._connect().execute("UPDATE jobs SET status = 'done', result = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                                    (json.dumps(result), job_id, worker))
+
+    def fail(self, job_id, worker, error):
+        with self._lock:
+            self._connect().execute("UPDATE jobs SET status = 'failed', error = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                                    (error, job_id, worker))
+
+    def collect(self, scan_id) -> list[dict]:
+        """Removes and returns the finished (done or failed) jobs of a scan."""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT id, kind, name, status, worker, result, error FROM jobs "
+                "WHERE scan_id = ? AND status IN ('done', 'failed') ORDER BY id",
+                (scan_id,),
+            ).fetchall()
+            if rows:
+                conn.execute(f"DELETE FROM jobs WHERE id IN ({', '.join('?' * len(rows))})", [row[0] for row in rows])
+        return [
+            {"id": row[0], "kind": row[1], "name": row[2], "status": row[3], "worker": row[4],
+             "result": json.loads(row[5]) if row[5] is not None else None, "error": row[6]}
+            for row in rows
+        ]
+
+    def cancel(self, scan_id):
+        """Drops all jobs of a scan that are not finished yet; running ones are not interrupted."""
+        with self._lock:
+            self._connect().execute("DELETE FROM jobs WHERE scan_id = ?", (scan_id,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,78 @@
+import threading
+
+class SourceLinks:
+    """Collects the results of one source component's stage-2 units (discovery, refinement of every generic
+    connector type of a link, security of every link category). Each unit is counted when it is submitted and
+    released when it succeeds; after the last release, on_complete(self) receives the assembled result."""
+
+    def __init__(self, source_name, log, on_complete):
+        self.source_name = source_name
+        self.log = log
+        self.file_contents = None
+        self.links = []
+        self.hints = []
+        self._on_complete = on_complete
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def add_link(self, target_name, generic_types):
+        link = {
+            "target_name": target_name,
+            "generic_types": list(generic_types),
+            # Generic types stay in place unless a refinement unit replaces them with a specific type.
+            "connector_types": list(generic_types),
+            "refinement_hints": [None] * len(generic_types),
+            "annotations": {},
+            # Explanations wait here for their selection unit when explanations run before selections.
+            "explanations": {},
+            "pending_refinements": 0,
+        }
+        self.links.append(link)
+        return link
+
+    def acquire(self):
+        with self._lock:
+            self._pending += 1
+
+    def release(self):
+        with self._lock:
+            self._pending -= 1
+            finished = self._pending == 0
+        if finished:
+            self._on_complete(self)
+
+    def refinement_done(self, link):
+        """Marks one refinement of link as finished. Returns True for the last one."""
+        with self._lock:
+            link["pending_refinements"] -= 1
+            return link["pending_refinements"] == 0
+
+    def link_data(self, security_categories):
+        """The {"links", "links_hint"} structure stored for the source, in discovery and category order."""
+        links_hint = list(self.hints)
+        final_links = []
+        for link in self.links:
+            links_hint.extend(hint for hint in link["refinement_hints"] if hint)
+            collected_security_annotations = []
+            security_annotation_hints = []
+            for category_name, category_list in security_categories.items():
+                selected_annotation = link["annotations"].get(category_name)
+                item_names = [item['name'] for item in category_list]
+                if selected_annotation in item_names:
+                    collected_security_annotations.append(selected_annotation)
+                elif selected_annotation and selected_annotation.lower() != 'none':
+                    security_annotation_hints.append(selected_annotation)
+            link_object = {
+                "target_name": link["target_name"],
+                "connector_types": link["connector_types"],
+                "security_annotations": collected_security_annotations
+            }
+            if security_annotation_hints:
+                link_object["security_annotation_hints"] = security_annotation_hints
+            final_links.append(link_object)
+        link_data = {}
+        if final_links:
+            link_data["links"] = final_links
+        if links_hint:
+            link_data["links_hint"] = links_hint
+        return link_data
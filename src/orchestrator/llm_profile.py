@@ -0,0 +1,59 @@
+import csv
+import json
+import os
+
+DEFAULT_TOP_N = 10
+
+CSV_FIELDS = [
+    "stage", "component", "category", "target", "route", "model", "cache_hit", "prompt_chars",
+    "prompt_tokens_estimate", "prompt_eval_count", "response_chars", "eval_count", "prompt_eval_s", "eval_s",
+    "load_s", "latency_s", "error",
+]
+
+def profile_path_for(json_path: str) -> str:
+    base, _ = os.path.splitext(json_path)
+    return f"{base}.profile.json"
+
+def summarize_by_stage(records: list[dict]) -> dict:
+    """Per stage: calls, cache hits, errors, summed latency, prompt-eval and generation time, and token counts."""
+    stages = {}
+    for record in records:
+        stage = stages.setdefault(record.get("stage") or "unknown", {
+            "calls": 0, "cache_hits": 0, "errors": 0, "latency_s": 0.0, "prompt_eval_s": 0.0, "eval_s": 0.0,
+            "prompt_tokens": 0, "response_tokens": 0,
+        })
+        stage["calls"] += 1
+        stage["cache_hits"] += int(bool(record.get("cache_hit")))
+        stage["errors"] += int(bool(record.get("error")))
+        stage["latency_s"] += record.get("latency_s") or 0.0
+        stage["prompt_eval_s"] += record.get("prompt_eval_s") or 0.0
+        stage["eval_s"] += record.get("eval_s") or 0.0
+        stage["prompt_tokens"] += record.get("prompt_eval_count") or 0
+        stage["response_tokens"] += record.get("eval_count") or 0
+    return stages
+
+def slowest(records: list[dict], n: int = DEFAULT_TOP_N) -> list[dict]:
+    return sorted(records, key=lambda r: r.get("latency_s") or 0.0, reverse=True)[:n]
+
+def describe(record: dict) -> str:
+    parts = [record.get("stage") or "unknown", record.get("component") or "-"]
+    if record.get("target"):
+        parts[-1] += f" -> {record['target']}"
+    if record.get("category"):
+        parts.append(record["category"])
+    return " / ".join(parts) + f" ({record.get('route')}, {record.get('model')})"
+
+def write_profile(records: list[dict], json_path: str, log):
+    """Writes the call records and the per-stage summary as JSON, and the records as CSV next to it."""
+    csv_path = os.path.splitext(json_path)[0] + ".csv"
+    try:
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({"stages": summarize_by_stage(records), "calls": records}, f, indent=2)
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(records)
+        log(f"INFO: LLM call profile written to '{json_path}' and '{csv_path}'.")
+    except Exception as e:
+        log(f"WARNING: Could not write the LLM call profile: {e}")
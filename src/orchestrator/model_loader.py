@@ -0,0 +1,53 @@
+import json
+import os
+from src.codeable_models import CClass, CBundle, add_links
+from src.metamodels.component_metamodel import component
+from src.metamodels import microservice_components_metamodel, security_annotations_metamodel
+
+DEFAULT_MODEL_NAME = "discovered_model"
+
+def _stereotype_namespace():
+    # The names the generated Python model sees through its star imports; later modules win, as there.
+    namespace = {}
+    for module in (microservice_components_metamodel, security_annotations_metamodel):
+        namespace.update({name: value for name, value in vars(module).items() if not name.startswith('_')})
+    return namespace
+
+def _stereotypes(names, namespace, owner):
+    stereotypes = []
+    for name in names:
+        if not name:
+            continue
+        if name not in namespace:
+            raise ValueError(f"Unknown stereotype '{name}' on {owner}.")
+        stereotypes.append(namespace[name])
+    return stereotypes
+
+def load_model(data: dict, name: str = DEFAULT_MODEL_NAME, log_callback=None) -> CBundle:
+    """Builds the component model of discovered_components.json data in memory: the same CClass components,
+    add_links connectors and CBundle as the Python model written by model_generator, without generating, writing
+    or importing it. Every call returns new model objects, so the metrics can be calculated repeatedly."""
+    log = log_callback or print
+    namespace = _stereotype_namespace()
+    classes = {}
+    for component_name, details in data.items():
+        stereotype_names = [details.get("type")] + list(details.get("security_annotations", []))
+        classes[component_name] = CClass(component, component_name.replace('-', ' ').title(),
+                                         stereotype_instances=_stereotypes(stereotype_names, namespace, f"component '{component_name}'"))
+    for source_name, details in data.items():
+        for link in details.get("links") or []:
+            target_name = link.get("target_name")
+            if not target_name or target_name not in data:
+                log(f"WARNING: Skipping link from '{source_name}' to non-existent target '{target_name}'.")
+                continue
+            stereotype_names = list(link.get("connector_types", [])) + list(link.get("security_annotations", []))
+            add_links({classes[source_name]: classes[target_name]}, role_name="target",
+                      stereotype_instances=_stereotypes(stereotype_names, namespace, f"link '{source_name}' -> '{target_name}'"))
+    return CBundle(name.replace('-', '_').replace(' ', '_'), elements=[c.class_object for c in classes.values()])
+
+def load_model_from_json(json_path: str, project_path: str | None = None, log_callback=None) -> CBundle:
+    """Loads the model of a scan output file; the bundle is named after the project folder, as in the generated model."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    name = os.path.basename(os.path.normpath(project_path)) if project_path else DEFAULT_MODEL_NAME
+    return load_model(data, name, log_callback)
@@ -1,26 +1,37 @@
+# Every prompt that needs a component's source starts with the same build_component_context() prefix and
+# puts the question after it, so consecutive prompts about one component share their longest part and
+# Ollama can reuse the already evaluated prefix instead of re-processing the source for every question.
+def build_component_context(component_name: str, file_contents: str) -> str:
+    return f"""
+            You are a software architect reviewing the service '{component_name}' of a microservice system.
+            Its source files are given below; a question about this service follows them.
+
+            File Contents of '{component_name}':
+            {file_contents}
+
+            ---
+            """
+
 def build_generic_stereotype_prompt(component_name: str, file_contents: str, stereotype_list: list) -> str:
     stereotypes_with_desc = "\n".join([f"- {s['name']}: {s['description']}" for s in stereotype_list])
-    return f"""
+    return build_component_context(component_name, file_contents) + f"""
             Analyze the service '{component_name}' based on its name and file contents.
             Explain which of the following GENERIC stereotypes it best fits.
             Your task is to provide a brief explanation for which stereotype from the list it best fits.
             Conclude your explanation with your final choice. DO NOT ask any questions.
             Available Generic Stereotypes:
             {stereotypes_with_desc}
-
-            File Contents: {file_contents}
             """
 
-def build_specific_stereotype_prompt(component_name: str, file_contents: str, generic_stereotype: str, generic_explanation: str, specific_stereotype_list: list) -> str:
+def build_specific_stereotype_prompt(component_name: str, file_contents: str, generic_stereotype: str, generic_explanation: str, specific_stereotype_list: list, subject: str | None = None) -> str:
     stereotypes_with_desc = "\n".join([f"- {s['name']}: {s['description']}" for s in specific_stereotype_list])
-    return f"""
-            The component '{component_name}' has been classified as a '{generic_stereotype}'.
+    return build_component_context(component_name, file_contents) + f"""
+            The component '{subject or component_name}' has been classified as a '{generic_stereotype}'.
             Now, refine this by explaining which of the following MORE SPECIFIC stereotypes it best fits.
 
             Available Specific Stereotypes:
             {stereotypes_with_desc}
 
-            File Contents: {file_contents}
             Initial Analysis: {generic_explanation}
             """
 
@@ -35,16 +46,13 @@ def build_selection_prompt(explanation: str, stereotype_names: list) -> str:
             
 def build_security_explanation_prompt(component_name: str, stereotype: str, file_contents: str, category_name: str, category_list: list) -> str:
     annotations_with_desc = "\n".join([f"- {item['name']}: {item['description']}" for item in category_list])
-    return f"""
+    return build_component_context(component_name, file_contents) + f"""
             You are analyzing the '{component_name}' component, which has been identified as a '{stereotype}'.
             Focus ONLY on the security category: '{category_name}'.
             Based on the file contents, explain which ONE of the following annotations best applies. If none seem relevant, state that clearly.
 
             Available Annotations for this category:
             {annotations_with_desc}
-
-            File Contents:
-            {file_contents}
             """
 
 def build_single_selection_prompt(explanation: str, item_names: list, category_name: str) -> str:
@@ -60,7 +68,7 @@ def build_single_selection_prompt(explanation: str, item_names: list, category_n
 def build_generic_link_prompt(source_component: str, all_components: list, file_contents: str, generic_connector_list: list) -> str:
     stereotypes_with_desc = "\n".join([f"- {s['name']}: {s['description']}" for s in generic_connector_list])
     potential_targets = [c for c in all_components if c != source_component]
-    return f"""
+    return build_component_context(source_component, file_contents) + f"""
             You are a software architect analyzing network connections.
             Your task is to identify all components that the source component '{source_component}' communicates with.
 
@@ -81,14 +89,11 @@ def build_generic_link_prompt(source_component: str, all_components: list, file_
 
             **Available Generic Connectors:**
             {stereotypes_with_desc}
-
-            **File Contents for Source Component '{source_component}':**
-            {file_contents}
             """
             
 def build_link_security_explanation_prompt(source_name: str, target_name: str, connector_types: list, file_contents: str, category_name: str, category_list: list) -> str:
     annotations_with_desc = "\n".join([f"- {item['name']}: {item['description']}" for item in category_list])
-    return f"""
+    return build_component_context(source_name, file_contents) + f"""
             You are analyzing the security of a specific connection between two components:
             - Source: '{source_name}'
             - Target: '{target_name}'
@@ -99,7 +104,89 @@ def build_link_security_explanation_prompt(source_name: str, target_name: str, c
 
             Available Annotations for this category:
             {annotations_with_desc}
+            """
+def build_chunk_summary_prompt(component_name: str, chunk_index: int, chunk_count: int, chunk: str) -> str:
+    return f"""
+            You are reading part {chunk_index} of {chunk_count} of the source files of the service '{component_name}'.
+            Summarize ONLY the facts in this part that matter for a security architecture review, as short bullet points:
+            - frameworks, libraries and dependencies (e.g. web frameworks, database drivers, broker clients, auth or crypto libraries)
+            - other services, hosts, URLs, ports, queues or topics it connects to, and the protocol used
+            - authentication and authorization mechanisms (logins, tokens, JWT, OAuth, API keys, CSRF protection)
+            - how secrets and credentials are handled (hardcoded values, environment variables, encrypted values, vaults)
+            - use of TLS/HTTPS or plaintext connections
+            Quote exact names, keys and values where relevant. If this part contains nothing relevant, answer "Nothing relevant."
+
+            File Contents (part {chunk_index} of {chunk_count}):
+            {chunk}
+            """
 
-            File Contents of '{source_name}':
-            {file_contents}
-            """
\ No newline at end of file
+def _format_categories(categories: dict) -> str:
+    sections = []
+    for category_name, category_list in categories.items():
+        items = "\n".join([f"  - {item['name']}: {item['description']}" for item in category_list])
+        sections.append(f"- Category '{category_name}':\n{items}")
+    return "\n".join(sections)
+
+def build_batched_security_prompt(component_name: str, stereotype: str, file_contents: str, categories: dict) -> str:
+    return build_component_context(component_name, file_contents) + f"""
+            You are analyzing the '{component_name}' component, which has been identified as a '{stereotype}'.
+            For EACH security category below, decide which ONE annotation best applies based on the file contents.
+
+            **CRITICAL RULE:** Respond with ONLY a single valid JSON object.
+            It must have exactly one key per category name, and each value must be the exact name of one annotation
+            listed under that category, or the string "None" if none of them apply.
+            Example: {{"<category name>": "<annotation name or None>"}}
+
+            ---
+            **Security Categories and Available Annotations:**
+{_format_categories(categories)}
+            """
+
+def build_batched_link_security_prompt(source_name: str, target_name: str, connector_types: list, file_contents: str, categories: dict) -> str:
+    return build_component_context(source_name, file_contents) + f"""
+            You are analyzing the security of a specific connection between two components:
+            - Source: '{source_name}'
+            - Target: '{target_name}'
+            This connection has been identified with the following connector types: {connector_types}.
+            For EACH security category below, decide which ONE annotation best applies to this specific connection,
+            based on the file contents of the SOURCE component ('{source_name}').
+
+            **CRITICAL RULE:** Respond with ONLY a single valid JSON object.
+            It must have exactly one key per category name, and each value must be the exact name of one annotation
+            listed under that category, or the string "None" if none of them apply.
+            Example: {{"<category name>": "<annotation name or None>"}}
+
+            ---
+            **Security Categories and Available Annotations:**
+{_format_categories(categories)}
+            """
+
+def build_link_confirmation_prompt(source_component: str, candidates: dict, file_contents: str, generic_connector_list: list) -> str:
+    stereotypes_with_desc = "\n".join([f"- {s['name']}: {s['description']}" for s in generic_connector_list])
+    candidate_lines = "\n".join([
+        f"- {target}: found via {', '.join(info['evidence'])}"
+        + (f"; suggested connector types: {info['connector_types']}" if info['connector_types'] else "")
+        for target, info in candidates.items()
+    ])
+    return build_component_context(source_component, file_contents) + f"""
+            You are a software architect analyzing network connections.
+            The deployment configuration and the source of '{source_component}' suggest that it communicates with the
+            candidate components listed below. For each candidate, confirm whether '{source_component}' really sends
+            requests or messages to it, and select one or more generic connector types that describe the connection.
+            Suggested connector types are only hints derived from connection strings; correct them if needed.
+
+            **CRITICAL RULE:** Respond with ONLY a single valid JSON object.
+            This object must have a single key, "links", containing a list of objects, one per CONFIRMED candidate.
+            Each object in the list must have two keys:
+            1. "target_component": The exact name of a component from the candidate list.
+            2. "connector_types": A list of one or more stereotype names from the available generic connectors list.
+
+            If no candidate is confirmed, return an empty list: {{"links": []}}
+
+            ---
+            **Candidate Target Components:**
+            {candidate_lines}
+
+            **Available Generic Connectors:**
+            {stereotypes_with_desc}
+            """
@@ -1,199 +1,795 @@
+import json
 import os
+import threading
+import time
+import uuid
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from . import knowledge_base
 from . import prompt_builder
 from . import output_generator
+from . import fingerprints
+from .checkpoint import ScanCheckpoint, checkpoint_path_for
+from . import chunking
+from . import file_selection
+from . import static_classifier
+from . import static_links
+from . import llm_profile
+from .file_ingestion import FileIngestionCache
+from .task_graph import TaskGraph
+from .work_queue import WorkQueue
+from .job_queue import JobQueue
+from . import link_work
 from src.agent.agent import (
+    answer_settings,
     get_explanation,
     select_stereotype_from_explanation,
     get_structured_annotations
 )
-from src.agent.tools import read_multiple_files
+from src.agent.llm_backend import llm_backend
+from src.agent.llm_runtime import llm_runtime, ScanCancelled
+from src.agent.llm_tracer import llm_tracer
+from src.agent.model_router import model_router
+from src.agent.response_cache import response_cache
+from src.agent.token_estimate import estimate_tokens
+
+def _env_flag(name):
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+def scan_options_from_env():
+    """ScannerOrchestrator settings configured through .env (see README, Step 5), shared by the GUI and the CLI."""
+    return {
+        "max_concurrency": int(os.getenv("SCAN_MAX_CONCURRENCY", "1")),
+        "task_concurrency": int(os.getenv("SCAN_TASK_CONCURRENCY", "1")),
+        "link_concurrency": int(os.getenv("SCAN_LINK_CONCURRENCY", "1")),
+        "target_specific_refinement": [t.strip() for t in os.getenv("SCAN_TARGET_SPECIFIC_REFINEMENT", "").split(",") if t.strip()],
+        "file_token_budget": int(os.getenv("SCAN_FILE_TOKEN_BUDGET", str(file_selection.DEFAULT_TOKEN_BUDGET))),
+        "chunk_tokens": int(os.getenv("SCAN_CHUNK_TOKENS", "0")) or None,
+        "batch_security": _env_flag("SCAN_BATCH_SECURITY"),
+        "static_confidence_threshold": float(os.getenv("SCAN_STATIC_CONFIDENCE")) if os.getenv("SCAN_STATIC_CONFIDENCE") else static_classifier.DEFAULT_CONFIDENCE_THRESHOLD,
+        "static_link_discovery": _env_flag("SCAN_STATIC_LINKS"),
+        "profile_top_n": int(os.getenv("SCAN_PROFILE_TOP", str(llm_profile.DEFAULT_TOP_N))),
+        "job_queue_path": os.getenv("SCAN_JOB_QUEUE") or None,
+    }
+
+JOB_POLL_SECONDS = 0.5
 
 class ScannerOrchestrator:
-    def __init__(self, project_path, log_callback):
+    def __init__(self, project_path, log_callback, max_concurrency=1, task_concurrency=1,
+                 incremental=False, resume=False, output_path="output/discovered_components.json",
+                 file_token_budget=file_selection.DEFAULT_TOKEN_BUDGET, chunk_tokens=None, batch_security=False,
+                 static_confidence_threshold=static_classifier.DEFAULT_CONFIDENCE_THRESHOLD, static_link_discovery=False,
+                 stream_callback=None, profile_top_n=llm_profile.DEFAULT_TOP_N, link_concurrency=1,
+                 target_specific_refinement=(), job_queue_path=None):
         self.project_path = project_path
         self.log = log_callback
+        self.max_concurrency = max_concurrency
+        self.task_concurrency = task_concurrency
+        self.incremental = incremental
+        self.resume = resume
+        self.output_path = output_path
+        self.checkpoint = ScanCheckpoint(checkpoint_path_for(output_path))
+        self.fingerprints = {"components": {}, "links": {}}
+        self.file_token_budget = file_token_budget
+        self.ingestion = FileIngestionCache()
+        self._file_selections = {}
+        self._selection_lock = threading.Lock()
+        self.chunk_tokens = chunk_tokens
+        self.batch_security = batch_security
+        self.static_confidence_threshold = static_confidence_threshold
+        self.static_link_discovery = static_link_discovery
+        self.stream_callback = stream_callback
+        self._streaming = False
+        self.profile_top_n = profile_top_n
+        self.link_concurrency = link_concurrency
+        self._summaries = {}
+        self._summary_locks = {}
+        self._summary_lock = threading.Lock()
+        self.target_specific_refinement = set(target_specific_refinement)
+        self._refinements = {}
+        self._refinement_locks = {}
+        self._refinement_lock = threading.Lock()
+        self.job_queue_path = job_queue_path
         self.components_data = {}
 
     def run_scan(self):
+        """Runs both stages and writes the JSON output. Returns True if the scan completed."""
+        completed = False
+        llm_backend.reset_stats()
+        response_cache.reset_stats()
+        model_router.reset_stats()
+        llm_tracer.reset()
+        self.ingestion.clear()
+        self._file_selections = {}
+        self._summaries = {}
+        self._refinements = {}
+        llm_runtime.reset()
+        # Tokens go straight to stream_callback, so explanations can only be streamed while one call runs at a time.
+        self._streaming = self.stream_callback is not None and not self.job_queue_path and \
+            max(self.max_concurrency, self.task_concurrency, self.link_concurrency) <= 1
+        llm_runtime.stream_callback = self.stream_callback if self._streaming else None
         try:
+            if self.stream_callback is not None and not self._streaming:
+                self.log("INFO: Live streaming of explanations is off because several LLM calls may run at the same time.")
             self.log("\n--- STAGE 1: Analyzing Components ---")
             docker_compose_path = os.path.join(self.project_path, 'docker-compose.yaml')
             with open(docker_compose_path, 'r') as f:
                 docker_compose_data = yaml.safe_load(f)
             component_list = list(docker_compose_data.get('services', {}).keys())
-            self._analyze_components(component_list, docker_compose_data)
+            current_fingerprints = self._compute_fingerprints(component_list, docker_compose_data)
+            self.fingerprints = current_fingerprints
+            if self.resume:
+                restored = self.checkpoint.load()
+                self.log(f"INFO: Resuming scan: {restored} finished units found in checkpoint.")
+            else:
+                self.checkpoint.clear()
+            previous_data, previous_fingerprints = self._load_previous_scan()
+            changed_components = [
+                c for c in component_list
+                if c not in previous_data
+                or previous_fingerprints["components"].get(c) != current_fingerprints["components"][c]
+            ]
+            if self.incremental:
+                self.log(f"INFO: Incremental scan: {len(changed_components)} of {len(component_list)} components changed.")
+            for component_name in component_list:
+                if component_name not in changed_components:
+                    self.components_data[component_name] = {
+                        k: v for k, v in previous_data[component_name].items() if k not in ("links", "links_hint")
+                    }
+            self._analyze_components(changed_components, docker_compose_data)
+            self.components_data = {c: self.components_data[c] for c in component_list}
             self.log("--- STAGE 1 COMPLETE ---")
             self.log("\n--- STAGE 2: Analyzing Links Between Components ---")
-            self._analyze_and_create_links(component_list, docker_compose_data)
+            link_sources = [
+                c for c in component_list
+                if c in changed_components
+                or previous_fingerprints["links"].get(c) != current_fingerprints["links"][c]
+            ]
+            for source_name in component_list:
+                if source_name not in link_sources:
+                    for key in ("links", "links_hint"):
+                        if key in previous_data[source_name]:
+                            self.components_data[source_name][key] = previous_data[source_name][key]
+            self._analyze_and_create_links(component_list, docker_compose_data, link_sources)
             self.log("--- STAGE 2 COMPLETE ---")
-            output_generator.generate_json_output(self.components_data, self.log)
+            output_generator.generate_json_output(self.components_data, self.log, file_path=self.output_path)
+            fingerprints.save_fingerprints(fingerprints.fingerprint_path_for(self.output_path), current_fingerprints, self.log)
+            self.checkpoint.clear()
             self.log("\n✅ SCAN COMPLETE: Process finished successfully.")
+            completed = True
+        except ScanCancelled:
+            self.log("\n⛔ SCAN CANCELLED: Finished components and links are kept in the checkpoint; use resume to continue.")
         except Exception as e:
             self.log(f"\n❌ FATAL ERROR: The orchestration failed: {e}")
+        finally:
+            llm_runtime.stream_callback = None
+            self.ingestion.clear()
+            self._log_llm_stats()
+            self._write_llm_profile()
+        return completed
+
+    def _log_llm_stats(self):
+        stats = llm_backend.summary()
+        self.log(f"INFO: LLM calls: {stats['calls']} ({stats['reused_calls']} on reused connections, "
+                 f"{stats['clients']} pooled clients), avg latency {stats['avg_latency']:.2f}s, "
+                 f"total {stats['total_latency']:.1f}s.")
+        if "replay_misses" in stats:
+            self.log(f"INFO: LLM replay: {stats['replay_misses']} prompts were not in the trace and got synthetic answers.")
+        cache_stats = response_cache.summary()
+        self.log(f"INFO: LLM response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses.")
+        for route in model_router.summary():
+            agreement = f", agrees with {model_router.default_model} in {route['agreement']:.0%} of {route['compared']} sampled" \
+                if route['agreement'] is not None else ""
+            self.log(f"INFO: LLM route '{route['route']}' -> {route['model']}: {route['calls']} calls, "
+                     f"avg latency {route['avg_latency']:.2f}s{agreement}.")
 
-    def _get_file_contents(self, component_name, service_info):
-        """Helper to read source files for a given component."""
-        build_context = service_info.get('build', {}).get('context')
+    def _write_llm_profile(self):
+        records = llm_tracer.snapshot()
+        if not records:
+            return
+        llm_profile.write_profile(records, llm_profile.profile_path_for(self.output_path), self.log)
+        for stage, stats in llm_profile.summarize_by_stage(records).items():
+            self.log(f"INFO: Stage '{stage}': {stats['calls']} calls ({stats['cache_hits']} cached, {stats['errors']} failed), "
+                     f"{stats['latency_s']:.1f}s total, {stats['prompt_eval_s']:.1f}s prompt eval, {stats['eval_s']:.1f}s generation.")
+        self.log("INFO: Slowest LLM calls:")
+        for record in llm_profile.slowest(records, self.profile_top_n):
+            self.log(f"  {record['latency_s']:.2f}s  {llm_profile.describe(record)}")
+
+    def _load_previous_scan(self):
+        """Returns the previous JSON output and its fingerprints, or empty ones for a full scan."""
+        empty_fingerprints = {"components": {}, "links": {}}
+        if not self.incremental:
+            return {}, empty_fingerprints
+        try:
+            with open(self.output_path, 'r', encoding='utf-8') as f:
+                previous_data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.log("INFO: No previous scan results found. Running a full scan.")
+            return {}, empty_fingerprints
+        return previous_data, fingerprints.load_fingerprints(fingerprints.fingerprint_path_for(self.output_path))
+
+    def _compute_fingerprints(self, component_list, docker_compose_data):
+        services = docker_compose_data.get('services', {})
+        result = {"components": {}, "links": {}}
+        # Results of a scan with other models or analysis options are not reused, even for unchanged files.
+        component_options = {
+            **answer_settings(),
+            "batch_security": self.batch_security,
+            "chunk_tokens": self.chunk_tokens,
+            "static_confidence_threshold": self.static_confidence_threshold,
+        }
+        link_options = {
+            "static_link_discovery": self.static_link_discovery,
+            "target_specific_refinement": sorted(self.target_specific_refinement),
+        }
+        for component_name in component_list:
+            service_info = services.get(component_name) or {}
+            build_dir, selection = self._resolve_component_files(component_name, service_info)
+            file_digests = {
+                os.path.relpath(path, build_dir): f"{self.ingestion.read(path).digest}:{limit}" for path, limit in selection
+            }
+            component_fingerprint = fingerprints.fingerprint_component(service_info, file_digests, component_options)
+            result["components"][component_name] = component_fingerprint
+            result["links"][component_name] = fingerprints.fingerprint_links(component_fingerprint, component_list, link_options)
+        return result
+
+    def _resolve_component_files(self, component_name, service_info):
+        """Returns the component's build directory (None for image-based services) and the ranked
+        (path, max_chars) selection of its files that fits the token budget."""
+        build = service_info.get('build', {})
+        if isinstance(build, str):
+            build = {'context': build}
+        build_context = build.get('context')
         if build_context == '.':
-            dockerfile_path = service_info.get('build', {}).get('dockerfile')
+            dockerfile_path = build.get('dockerfile')
             if dockerfile_path and '/' in dockerfile_path:
                 build_context = os.path.dirname(dockerfile_path)
             else:
                 build_context = component_name
-        elif build_context is None and 'image' in service_info:
+        elif build_context is None:
             build_context = component_name
         full_component_path = os.path.abspath(os.path.join(self.project_path, build_context))
         if not os.path.isdir(full_component_path):
-            return f"This is an image-based service named '{component_name}'. No local files."
+            return None, []
+        with self._selection_lock:
+            if full_component_path not in self._file_selections:
+                self._file_selections[full_component_path] = file_selection.select_files(
+                    full_component_path, self.ingestion, self.file_token_budget
+                )
+            return full_component_path, self._file_selections[full_component_path]
+
+    def _get_file_contents(self, component_name, service_info, log=None):
+        """Helper to read source files for a given component. In chunked mode, contents larger than
+        chunk_tokens are replaced by per-chunk summaries that are shared by every prompt of the scan."""
+        file_contents = self._read_file_contents(component_name, service_info)
+        if not self.chunk_tokens or estimate_tokens(file_contents) <= self.chunk_tokens:
+            return file_contents
+        with self._summary_lock:
+            summary_lock = self._summary_locks.setdefault(component_name, threading.Lock())
+        with summary_lock:
+            if component_name not in self._summaries:
+                self._summaries[component_name] = self._summarize_contents(component_name, file_contents, log or self.log)
+            return self._summaries[component_name]
+
+    def _read_file_contents(self, component_name, service_info):
         try:
-            files_to_read = [os.path.join(full_component_path, f) for f in os.listdir(full_component_path) if os.path.isfile(os.path.join(full_component_path, f)) and not f.endswith(('.lock', '.ico', '.png'))][:10]
-            return read_multiple_files.invoke({"file_paths": files_to_read}) if files_to_read else f"Directory for service '{component_name}' is empty."
+            full_component_path, selection = self._resolve_component_files(component_name, service_info)
+            if full_component_path is None:
+                return f"This is an image-based service named '{component_name}'. No local files."
+            return self.ingestion.component_contents(component_name, selection) if selection else f"Directory for service '{component_name}' is empty."
         except Exception as e:
             return f"Error reading files for service '{component_name}': {e}"
 
+    def _summarize_contents(self, component_name, file_contents, log):
+        chunks = list(chunking.iter_chunks(file_contents, self.chunk_tokens))
+        log(f"INFO: Source of '{component_name}' exceeds {self.chunk_tokens} tokens. Summarizing {len(chunks)} chunks...")
+        graph = TaskGraph()
+        for index, chunk in enumerate(chunks, start=1):
+            graph.add(index, llm_tracer.bind(lambda results, i=index, c=chunk: get_explanation(
+                prompt_builder.build_chunk_summary_prompt(component_name, i, len(chunks), c)),
+                stage="summary", component=component_name, category=f"part {index}"))
+        results = graph.run(max_workers=self.task_concurrency)
+        summaries = [
+            f"--- SUMMARY OF PART {index} OF {len(chunks)} ---\n{results[index] or '(summary unavailable)'}\n\n"
+            for index in range(1, len(chunks) + 1)
+        ]
+        return "".join(summaries)
 
     def _analyze_components(self, component_list, docker_compose_data):
-        generic_stereotype_names = [s['name'] for s in knowledge_base.COMPONENT_GENERIC_STEREOTYPE_LIST]
+        services = docker_compose_data.get('services', {})
+        pending = []
         for component_name in component_list:
-            self.log(f"\n--- Running Analysis on '{component_name}' ---")
-            service_info = docker_compose_data.get('services', {}).get(component_name, {})
-            file_contents = self._get_file_contents(component_name, service_info)
-            final_stereotype = None
-            type_hint = None
-            prompt = prompt_builder.build_generic_stereotype_prompt(component_name, file_contents, knowledge_base.COMPONENT_GENERIC_STEREOTYPE_LIST)
-            generic_explanation = get_explanation(prompt)
-            self.log(f"INFO: AI Explanation (Generic): {generic_explanation}")
-            prompt = prompt_builder.build_selection_prompt(generic_explanation, generic_stereotype_names)
-            generic_stereotype = select_stereotype_from_explanation(prompt, choices=generic_stereotype_names)
-            if generic_stereotype in generic_stereotype_names:
-                final_stereotype = generic_stereotype
-                self.log(f"INFO: Selected Generic Stereotype: '{generic_stereotype}'")
-                if generic_stereotype in knowledge_base.COMPONENT_STEREOTYPE_HIERARCHY_MAP:
-                    specific_list = knowledge_base.COMPONENT_STEREOTYPE_HIERARCHY_MAP[generic_stereotype]
-                    specific_names = [s['name'] for s in specific_list]
-                    prompt = prompt_builder.build_specific_stereotype_prompt(component_name, file_contents, generic_stereotype, generic_explanation, specific_list)
-                    specific_explanation = get_explanation(prompt)
-                    self.log(f"INFO: AI Explanation (Specific): {specific_explanation}")
-                    prompt = prompt_builder.build_selection_prompt(specific_explanation, specific_names)
-                    specific_stereotype = select_stereotype_from_explanation(prompt, choices=specific_names)
-                    if specific_stereotype in specific_names:
-                        final_stereotype = specific_stereotype
-                        self.log(f"SUCCESS: Refined to specific stereotype: '{final_stereotype}'")
-                    else:
-                        type_hint = specific_stereotype
-                        self.log(f"INFO: No valid specific type chosen. Using generic '{final_stereotype}'.")
+            restored = self.checkpoint.get("component", component_name, self.fingerprints["components"].get(component_name)) if self.resume else None
+            if restored is not None:
+                self.log(f"INFO: Restored analysis of '{component_name}' from checkpoint.")
+                self.components_data[component_name] = restored
             else:
-                type_hint = generic_stereotype
-                self.log(f"WARNING: Invalid generic stereotype '{generic_stereotype}'. Type will be null.")
-            self.log(f"INFO: Final Stereotype for '{component_name}': '{final_stereotype}'")
-            self.log(f"\n--- Analyzing Security Annotations for '{component_name}' ---")
-            collected_security_annotations = []
-            security_annotation_hints = []
-            for category_name, category_list in knowledge_base.SECURITY_COMPONENT_ANNOTATIONS.items():
-                self.log(f"--- Analyzing Category: {category_name} ---")
-                prompt = prompt_builder.build_security_explanation_prompt(component_name, final_stereotype, file_contents, category_name, category_list)
-                security_explanation = get_explanation(prompt)
-                self.log(f"INFO: AI Explanation ({category_name}): {security_explanation}")
-                item_names = [item['name'] for item in category_list]
-                prompt = prompt_builder.build_single_selection_prompt(security_explanation, item_names, category_name)
-                selected_annotation = select_stereotype_from_explanation(prompt, choices=item_names) # Reusing the agent function
-                if selected_annotation in item_names:
-                    self.log(f"SUCCESS: Selected annotation '{selected_annotation}' for category '{category_name}'.")
-                    collected_security_annotations.append(selected_annotation)
-                elif selected_annotation and selected_annotation.lower() != 'none':
-                    self.log(f"INFO: Invalid annotation '{selected_annotation}' for category '{category_name}'. Storing as hint.")
-                    security_annotation_hints.append(selected_annotation)
+                pending.append(component_name)
+
+        def store(name, component_output):
+            self.checkpoint.record("component", name, self.fingerprints["components"].get(name), component_output)
+            self.components_data[name] = component_output
+
+        if self.job_queue_path:
+            self._dispatch_jobs("component", {name: {"service_info": services.get(name, {})} for name in pending}, store)
+            return
+
+        def analyze(name, log):
+            with llm_tracer.context(component=name):
+                component_output = self._analyze_component(name, services.get(name, {}), log)
+            self.checkpoint.record("component", name, self.fingerprints["components"].get(name), component_output)
+            return component_output
+
+        results = self._run_concurrently(pending, analyze)
+        for component_name in pending:
+            self.components_data[component_name] = results[component_name]
+
+    def _run_concurrently(self, names, work):
+        """Runs work(name, log) for every name with at most max_concurrency in flight.
+        Log lines are buffered per name and flushed as one block when that name finishes."""
+        results = {}
+        if self.max_concurrency <= 1:
+            for name in names:
+                results[name] = work(name, self.log)
+            return results
+        log_lock = threading.Lock()
+
+        def run(name):
+            buffered = []
+            try:
+                return work(name, buffered.append)
+            finally:
+                with log_lock:
+                    for message in buffered:
+                        self.log(message)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {name: executor.submit(run, name) for name in names}
+            for name, future in futures.items():
+                results[name] = future.result()
+        return results
+
+    def _dispatch_jobs(self, kind, payloads, on_result):
+        """Publishes one job per name to the job queue and hands every result to on_result(name, output) as soon as
+        a worker (see src/worker.py) has finished it. The worker's log lines and call trace are merged into this scan."""
+        queue = JobQueue(self.job_queue_path)
+        scan_id = uuid.uuid4().hex
+        options = self._job_options()
+        try:
+            for name, payload in payloads.items():
+                queue.publish(scan_id, kind, name, {"project_path": os.path.abspath(self.project_path), "options": options, **payload})
+            if payloads:
+                self.log(f"INFO: Published {len(payloads)} {kind} jobs to '{self.job_queue_path}'. Waiting for workers...")
+            remaining = set(payloads)
+            while remaining:
+                llm_runtime.check_cancelled()
+                finished = queue.collect(scan_id)
+                if not finished:
+                    time.sleep(JOB_POLL_SECONDS)
+                    continue
+                for job in finished:
+                    remaining.discard(job["name"])
+                    if job["status"] == "failed":
+                        raise RuntimeError(f"The {kind} job '{job['name']}' failed on worker '{job['worker']}': {job['error']}")
+                    for message in job["result"]["log"]:
+                        self.log(message)
+                    llm_tracer.extend(job["result"]["trace"])
+                    on_result(job["name"], job["result"]["output"])
+        finally:
+            # Drops the jobs no worker has finished, e.g. after a failure or cancellation.
+            queue.cancel(scan_id)
+            queue.close()
+
+    def _job_options(self):
+        """The settings a worker needs to analyze jobs exactly like this orchestrator would."""
+        return {
+            "task_concurrency": self.task_concurrency,
+            "link_concurrency": self.link_concurrency,
+            "target_specific_refinement": sorted(self.target_specific_refinement),
+            "file_token_budget": self.file_token_budget,
+            "chunk_tokens": self.chunk_tokens,
+            "batch_security": self.batch_security,
+            "static_confidence_threshold": self.static_confidence_threshold,
+            "static_link_discovery": self.static_link_discovery,
+        }
+
+    def run_job(self, kind, name, payload, log):
+        """Runs one job published by _dispatch_jobs and returns its output (called by scan workers)."""
+        if kind == "component":
+            with llm_tracer.context(component=name):
+                return self._analyze_component(name, payload["service_info"], log)
+        if kind == "links":
+            # Static link discovery reads the stage-1 types of the targets.
+            self.components_data = payload["components_data"]
+            return self._analyze_source_links(name, payload["component_list"], payload["services"], log)
+        raise ValueError(f"Unknown job kind '{kind}'.")
+
+    def _analyze_component(self, component_name, service_info, log):
+        log(f"\n--- Running Analysis on '{component_name}' ---")
+        file_contents = self._get_file_contents(component_name, service_info, log)
+        graph = TaskGraph()
+        graph.add("type", llm_tracer.bind(lambda results: self._classify_component(component_name, service_info, file_contents, log),
+                                          stage="component type"))
+        category_deps = ["type"]
+        if self.batch_security:
+            category_deps.append(graph.add("batch", llm_tracer.bind(lambda results: self._select_security_batch(
+                prompt_builder.build_batched_security_prompt(
+                    component_name, results["type"][0], file_contents, knowledge_base.SECURITY_COMPONENT_ANNOTATIONS),
+                knowledge_base.SECURITY_COMPONENT_ANNOTATIONS, log), stage="component security", category="batch"), deps=["type"]))
+        # All explanations are added before the selections, so a sequential run sends the explanation prompts, which
+        # share the component context prefix, back to back instead of evicting that prefix with a selection prompt
+        # in between.
+        for category_name, category_list in knowledge_base.SECURITY_COMPONENT_ANNOTATIONS.items():
+            # Categories answered by the batched call skip their own explanation and selection prompts.
+            graph.add(
+                f"explanation:{category_name}",
+                llm_tracer.bind(lambda results, c=category_name, l=category_list: None if c in results.get("batch", {}) else
+                                self._explain_component_security(component_name, results["type"][0], file_contents, c, l, log),
+                                stage="component security", category=category_name),
+                deps=category_deps
+            )
+        for category_name, category_list in knowledge_base.SECURITY_COMPONENT_ANNOTATIONS.items():
+            explanation_task = f"explanation:{category_name}"
+            graph.add(
+                f"selection:{category_name}",
+                llm_tracer.bind(lambda results, c=category_name, l=category_list, t=explanation_task: results["batch"][c]
+                                if c in results.get("batch", {}) else self._select_security_annotation(results[t], c, l, log),
+                                stage="component security", category=category_name),
+                deps=[explanation_task]
+            )
+        results = graph.run(max_workers=self.task_concurrency)
+        final_stereotype, type_hint = results["type"]
+        collected_security_annotations = []
+        security_annotation_hints = []
+        for category_name, category_list in knowledge_base.SECURITY_COMPONENT_ANNOTATIONS.items():
+            selected_annotation = results[f"selection:{category_name}"]
+            item_names = [item['name'] for item in category_list]
+            if selected_annotation in item_names:
+                collected_security_annotations.append(selected_annotation)
+            elif selected_annotation and selected_annotation.lower() != 'none':
+                security_annotation_hints.append(selected_annotation)
+        component_output = {
+            "type": final_stereotype,
+            "security_annotations": collected_security_annotations
+        }
+        if type_hint:
+            component_output["type_hint"] = type_hint
+        if security_annotation_hints:
+            component_output["security_annotation_hints"] = security_annotation_hints
+        log(f"SUCCESS: Analysis complete for '{component_name}'. Found {len(collected_security_annotations)} security annotations.")
+        return component_output
+
+    def _log_explanation(self, log, label, explanation):
+        if self._streaming and explanation is not None:
+            # The text (or the cached answer) has just been streamed to the log token by token.
+            log(f"INFO: AI Explanation ({label}) streamed above.")
+        else:
+            log(f"INFO: AI Explanation ({label}): {explanation}")
+
+    def _static_classification(self, component_name, service_info):
+        _, selection = self._resolve_component_files(component_name, service_info)
+        manifest_texts = [
+            self.ingestion.read(path).read_text() or "" for path, _ in selection
+            if os.path.basename(path).lower() in file_selection.DEPENDENCY_MANIFESTS
+        ]
+        return static_classifier.classify(component_name, service_info, manifest_texts)
+
+    def _classify_component(self, component_name, service_info, file_contents, log):
+        """Runs the generic -> specific type chain. Returns (final_stereotype, type_hint)."""
+        if self.static_confidence_threshold is not None:
+            static = self._static_classification(component_name, service_info)
+            if static and static["confidence"] >= self.static_confidence_threshold:
+                log(f"INFO: Statically classified '{component_name}' as '{static['stereotype']}' "
+                    f"(confidence {static['confidence']:.2f} from {', '.join(static['evidence'])}). Skipping LLM type analysis.")
+                log(f"INFO: Final Stereotype for '{component_name}': '{static['stereotype']}'")
+                log(f"\n--- Analyzing Security Annotations for '{component_name}' ---")
+                return static["stereotype"], None
+        generic_stereotype_names = [s['name'] for s in knowledge_base.COMPONENT_GENERIC_STEREOTYPE_LIST]
+        final_stereotype = None
+        type_hint = None
+        prompt = prompt_builder.build_generic_stereotype_prompt(component_name, file_contents, knowledge_base.COMPONENT_GENERIC_STEREOTYPE_LIST)
+        generic_explanation = get_explanation(prompt)
+        self._log_explanation(log, "Generic", generic_explanation)
+        prompt = prompt_builder.build_selection_prompt(generic_explanation, generic_stereotype_names)
+        generic_stereotype = select_stereotype_from_explanation(prompt, choices=generic_stereotype_names)
+        if generic_stereotype in generic_stereotype_names:
+            final_stereotype = generic_stereotype
+            log(f"INFO: Selected Generic Stereotype: '{generic_stereotype}'")
+            if generic_stereotype in knowledge_base.COMPONENT_STEREOTYPE_HIERARCHY_MAP:
+                specific_list = knowledge_base.COMPONENT_STEREOTYPE_HIERARCHY_MAP[generic_stereotype]
+                specific_names = [s['name'] for s in specific_list]
+                prompt = prompt_builder.build_specific_stereotype_prompt(component_name, file_contents, generic_stereotype, generic_explanation, specific_list)
+                specific_explanation = get_explanation(prompt)
+                self._log_explanation(log, "Specific", specific_explanation)
+                prompt = prompt_builder.build_selection_prompt(specific_explanation, specific_names)
+                specific_stereotype = select_stereotype_from_explanation(prompt, choices=specific_names)
+                if specific_stereotype in specific_names:
+                    final_stereotype = specific_stereotype
+                    log(f"SUCCESS: Refined to specific stereotype: '{final_stereotype}'")
                 else:
-                    self.log(f"INFO: No specific annotation selected for category '{category_name}'.")
-            component_output = {
-                "type": final_stereotype,
-                "security_annotations": collected_security_annotations
-            }
-            if type_hint:
-                component_output["type_hint"] = type_hint
-            if security_annotation_hints:
-                component_output["security_annotation_hints"] = security_annotation_hints
-            self.components_data[component_name] = component_output
-            self.log(f"SUCCESS: Analysis complete for '{component_name}'. Found {len(collected_security_annotations)} security annotations.")
-    
-    def _analyze_and_create_links(self, component_list, docker_compose_data):
-        """Analyzes and refines connections between all identified components."""
-        for source_name in component_list:
-            self.log(f"\n--- Analyzing outgoing links for '{source_name}' ---")
-            service_info = docker_compose_data.get('services', {}).get(source_name, {})
-            file_contents = self._get_file_contents(source_name, service_info)
-            self.log(f"INFO: Discovering all potential links from '{source_name}'...")
-            prompt = prompt_builder.build_generic_link_prompt(
-                source_component=source_name,
-                all_components=component_list,
-                file_contents=file_contents,
-                generic_connector_list=knowledge_base.CONNECTOR_GENERIC_STEREOTYPE_LIST
+                    type_hint = specific_stereotype if specific_stereotype != "None" else None
+                    log(f"INFO: No valid specific type chosen. Using generic '{final_stereotype}'.")
+        else:
+            type_hint = generic_stereotype if generic_stereotype != "None" else None
+            log(f"WARNING: Invalid generic stereotype '{generic_stereotype}'. Type will be null.")
+        log(f"INFO: Final Stereotype for '{component_name}': '{final_stereotype}'")
+        log(f"\n--- Analyzing Security Annotations for '{component_name}' ---")
+        return final_stereotype, type_hint
+
+    def _explain_component_security(self, component_name, stereotype, file_contents, category_name, category_list, log):
+        log(f"--- Analyzing Category: {category_name} ---")
+        prompt = prompt_builder.build_security_explanation_prompt(component_name, stereotype, file_contents, category_name, category_list)
+        security_explanation = get_explanation(prompt)
+        self._log_explanation(log, category_name, security_explanation)
+        return security_explanation
+
+    def _select_security_annotation(self, security_explanation, category_name, category_list, log):
+        item_names = [item['name'] for item in category_list]
+        prompt = prompt_builder.build_single_selection_prompt(security_explanation, item_names, category_name)
+        selected_annotation = select_stereotype_from_explanation(prompt, choices=item_names) # Reusing the agent function
+        if selected_annotation in item_names:
+            log(f"SUCCESS: Selected annotation '{selected_annotation}' for category '{category_name}'.")
+        elif selected_annotation and selected_annotation.lower() != 'none':
+            log(f"INFO: Invalid annotation '{selected_annotation}' for category '{category_name}'. Storing as hint.")
+        else:
+            log(f"INFO: No specific annotation selected for category '{category_name}'.")
+        return selected_annotation
+
+    def _confirm_static_links(self, source_name, component_list, services, file_contents, links_hint, log):
+        """Builds candidate links from compose and the raw source, then lets the LLM confirm and type only those.
+        Returns the same {"links": [...]} structure as the open-ended discovery prompt."""
+        target_types = {
+            name: static_classifier.generic_stereotype_of(data.get("type"))
+            for name, data in self.components_data.items() if data.get("type")
+        }
+        source_text = self._read_file_contents(source_name, services.get(source_name, {}))
+        candidates = static_links.discover_candidates(source_name, services, component_list, source_text, target_types)
+        if not candidates:
+            log(f"INFO: No link candidates found in the compose topology or source of '{source_name}'.")
+            return None
+        for target_name, info in candidates.items():
+            log(f"INFO: Link candidate '{source_name}' -> '{target_name}' ({', '.join(info['evidence'])}).")
+        prompt = prompt_builder.build_link_confirmation_prompt(
+            source_name, candidates, file_contents, knowledge_base.CONNECTOR_GENERIC_STEREOTYPE_LIST
+        )
+        link_results = get_structured_annotations(prompt)
+        if not isinstance(link_results, dict) or not isinstance(link_results.get("links"), list):
+            log(f"WARNING: Link confirmation failed for '{source_name}'. Using statically typed candidates.")
+            return {"links": [
+                {"target_component": target_name, "connector_types": info["connector_types"]}
+                for target_name, info in candidates.items() if info["connector_types"]
+            ]}
+        confirmed = []
+        for link in link_results["links"]:
+            if isinstance(link, dict) and link.get("target_component") in candidates:
+                confirmed.append(link)
+            else:
+                links_hint.append(f"Link to a component that is not a static candidate: {link}")
+        return {"links": confirmed}
+
+    def _select_security_batch(self, prompt, categories, log):
+        """Asks for all categories in one JSON call. Returns only the answers that name a valid item (or "None");
+        the remaining categories are left to the per-category prompts."""
+        answers = get_structured_annotations(prompt)
+        if not isinstance(answers, dict):
+            answers = {}
+        validated = {}
+        for category_name, category_list in categories.items():
+            value = answers.get(category_name)
+            if not isinstance(value, str):
+                continue
+            value = value.strip()
+            if value.lower() == 'none':
+                validated[category_name] = "None"
+                continue
+            match = next((item['name'] for item in category_list if item['name'].lower() == value.lower()), None)
+            if match:
+                validated[category_name] = match
+        for category_name, value in validated.items():
+            log(f"INFO: Batched selection for category '{category_name}': '{value}'")
+        failed = [c for c in categories if c not in validated]
+        log(f"INFO: Batched security call answered {len(validated)} of {len(categories)} categories.")
+        if failed:
+            log(f"INFO: Falling back to per-category prompts for: {', '.join(failed)}")
+        return validated
+
+    def _analyze_and_create_links(self, component_list, docker_compose_data, source_list=None):
+        """Analyzes and refines connections between all identified components. Link discovery per source,
+        refinement per (link, generic type) and security analysis per (link, category) are separate units on one
+        work queue, so up to link_concurrency units of any sources run at the same time."""
+        services = docker_compose_data.get('services', {})
+        queue = WorkQueue(max_workers=self.link_concurrency)
+        log_lock = threading.Lock()
+        jobs = {}
+        for source_name in (component_list if source_list is None else source_list):
+            fingerprint = self.fingerprints["links"].get(source_name)
+            link_data = self.checkpoint.get("links", source_name, fingerprint) if self.resume else None
+            if link_data is not None:
+                self.log(f"INFO: Restored links of '{source_name}' from checkpoint.")
+                self.components_data[source_name].update(link_data)
+                continue
+            if self.job_queue_path:
+                jobs[source_name] = {"component_list": component_list, "services": services}
+                continue
+            # With several workers, log lines are buffered per source and flushed once its links are complete.
+            buffered = [] if self.link_concurrency > 1 else None
+            state = link_work.SourceLinks(
+                source_name, self.log if buffered is None else buffered.append,
+                lambda state, f=fingerprint, b=buffered: self._finish_source_links(state, f, b, log_lock)
             )
-            link_results = get_structured_annotations(prompt)
-            if not link_results or "links" not in link_results:
-                self.log(f"INFO: No outgoing links were found for '{source_name}'.")
+            self._submit_link_unit(queue, state, self._discover_source_links, queue, state, component_list, services)
+        queue.join()
+        if jobs:
+            stage_1_data = {name: {k: v for k, v in data.items() if k not in ("links", "links_hint")}
+                            for name, data in self.components_data.items()}
+            for payload in jobs.values():
+                payload["components_data"] = stage_1_data
+
+            def store(source_name, link_data):
+                self.checkpoint.record("links", source_name, self.fingerprints["links"].get(source_name), link_data)
+                self.components_data[source_name].update(link_data)
+
+            self._dispatch_jobs("links", jobs, store)
+
+    def _analyze_source_links(self, source_name, component_list, services, log):
+        """Runs all stage-2 units of one source on a work queue of its own and returns the source's link data."""
+        queue = WorkQueue(max_workers=self.link_concurrency)
+        link_data = {}
+        state = link_work.SourceLinks(
+            source_name, log,
+            lambda state: link_data.update(state.link_data(knowledge_base.SECURITY_CONNECTOR_ANNOTATIONS))
+        )
+        self._submit_link_unit(queue, state, self._discover_source_links, queue, state, component_list, services)
+        queue.join()
+        log(f"SUCCESS: Link analysis complete for '{source_name}'.")
+        return link_data
+
+    def _submit_link_unit(self, queue, state, fn, *args):
+        state.acquire()
+        queue.submit(self._run_link_unit, state, fn, args)
+
+    @staticmethod
+    def _run_link_unit(state, fn, args):
+        fn(*args)
+        # A failed unit is never released, so a source with a failure is neither stored nor checkpointed.
+        state.release()
+
+    def _finish_source_links(self, state, fingerprint, buffered, log_lock):
+        link_data = state.link_data(knowledge_base.SECURITY_CONNECTOR_ANNOTATIONS)
+        state.log(f"SUCCESS: Link analysis complete for '{state.source_name}'.")
+        self.checkpoint.record("links", state.source_name, fingerprint, link_data)
+        self.components_data[state.source_name].update(link_data)
+        if buffered is not None:
+            with log_lock:
+                for message in buffered:
+                    self.log(message)
+
+    def _discover_source_links(self, queue, state, component_list, services):
+        source_name, log = state.source_name, state.log
+        log(f"\n--- Analyzing outgoing links for '{source_name}' ---")
+        with llm_tracer.context(stage="link discovery", component=source_name):
+            state.file_contents = self._get_file_contents(source_name, services.get(source_name, {}), log)
+            if self.static_link_discovery:
+                link_results = self._confirm_static_links(source_name, component_list, services, state.file_contents, state.hints, log)
+            else:
+                log(f"INFO: Discovering all potential links from '{source_name}'...")
+                prompt = prompt_builder.build_generic_link_prompt(
+                    source_component=source_name,
+                    all_components=component_list,
+                    file_contents=state.file_contents,
+                    generic_connector_list=knowledge_base.CONNECTOR_GENERIC_STEREOTYPE_LIST
+                )
+                link_results = get_structured_annotations(prompt)
+        if not link_results or "links" not in link_results:
+            log(f"INFO: No outgoing links were found for '{source_name}'.")
+            return
+        for link in link_results.get("links", []):
+            target_name = link.get("target_component")
+            generic_types = link.get("connector_types", [])
+            if not target_name or not generic_types:
+                state.hints.append(f"Malformed link object from AI: {link}")
                 continue
-            discovered_links = link_results.get("links", [])
-            final_links = []
-            links_hint = []
-            for link in discovered_links:
-                target_name = link.get("target_component")
-                generic_types = link.get("connector_types", [])
-                if not target_name or not generic_types:
-                    links_hint.append(f"Malformed link object from AI: {link}")
-                    continue
-                self.log(f"INFO: Refining link from '{source_name}' to '{target_name}'...")
-                final_connector_types = []
-                for g_type in generic_types:
-                    if g_type in knowledge_base.CONNECTOR_STEREOTYPE_HIERARCHY_MAP:
-                        specific_list = knowledge_base.CONNECTOR_STEREOTYPE_HIERARCHY_MAP[g_type]
-                        specific_names = [s['name'] for s in specific_list]
-                        expl_prompt = prompt_builder.build_specific_stereotype_prompt(
-                            f"{source_name} -> {target_name}", file_contents, g_type, f"This link is a '{g_type}'.", specific_list
-                        )
-                        specific_explanation = get_explanation(expl_prompt)
-                        sel_prompt = prompt_builder.build_single_selection_prompt(specific_explanation, specific_names, f"Specific type for {g_type}")
-                        specific_type = select_stereotype_from_explanation(sel_prompt, choices=specific_names)
-                        if specific_type and specific_type in specific_names:
-                            self.log(f"SUCCESS: Refined '{g_type}' to '{specific_type}'.")
-                            final_connector_types.append(specific_type)
-                        else:
-                            self.log(f"INFO: Could not refine '{g_type}', keeping the generic type.")
-                            final_connector_types.append(g_type) # Keep the generic one
-                            if specific_type and specific_type.lower() != 'none':
-                                links_hint.append(f"Invalid specific connector '{specific_type}' for generic '{g_type}'.")
-                    else:
-                        final_connector_types.append(g_type)
-                self.log(f"--- Analyzing Security for link '{source_name}' -> '{target_name}' ---")
-                collected_security_annotations = []
-                security_annotation_hints = []
-                for category_name, category_list in knowledge_base.SECURITY_CONNECTOR_ANNOTATIONS.items():
-                    item_names = [item['name'] for item in category_list]
-                    prompt = prompt_builder.build_link_security_explanation_prompt(
-                        source_name, target_name, final_connector_types, file_contents, category_name, category_list
-                    )
-                    security_explanation = get_explanation(prompt)
-                    self.log(f"INFO: AI Explanation (Link Security - {category_name}): {security_explanation}")
-                    prompt = prompt_builder.build_single_selection_prompt(security_explanation, item_names, category_name)
-                    selected_annotation = select_stereotype_from_explanation(prompt, choices=item_names)
-                    if selected_annotation in item_names:
-                        collected_security_annotations.append(selected_annotation)
-                    elif selected_annotation and selected_annotation.lower() != 'none':
-                        security_annotation_hints.append(selected_annotation)
-                link_object = {
-                    "target_name": target_name,
-                    "connector_types": final_connector_types,
-                    "security_annotations": collected_security_annotations
-                }
-                if security_annotation_hints:
-                    link_object["security_annotation_hints"] = security_annotation_hints
-
-                final_links.append(link_object)
-            if final_links:
-                self.components_data[source_name]["links"] = final_links
-            if links_hint:
-                self.components_data[source_name]["links_hint"] = links_hint
-
-            self.log(f"SUCCESS: Link analysis complete for '{source_name}'.")
\ No newline at end of file
+            self._submit_link_unit(queue, state, self._start_link, queue, state, state.add_link(target_name, generic_types))
+
+    def _start_link(self, queue, state, link):
+        refinable = [i for i, g_type in enumerate(link["generic_types"]) if g_type in knowledge_base.CONNECTOR_STEREOTYPE_HIERARCHY_MAP]
+        link["pending_refinements"] = len(refinable)
+        if not refinable:
+            self._submit_link_security(queue, state, link)
+            return
+        state.log(f"INFO: Refining link from '{state.source_name}' to '{link['target_name']}'...")
+        for index in refinable:
+            self._submit_link_unit(queue, state, self._refine_link_type, queue, state, link, index)
+
+    def _refine_link_type(self, queue, state, link, index):
+        source_name, target_name, log = state.source_name, link["target_name"], state.log
+        g_type = link["generic_types"][index]
+        specific_names = [s['name'] for s in knowledge_base.CONNECTOR_STEREOTYPE_HIERARCHY_MAP[g_type]]
+        specific_type, reused = self._refine_connector_type(source_name, target_name, g_type, state.file_contents)
+        if specific_type and specific_type in specific_names:
+            log(f"SUCCESS: Refined '{g_type}' to '{specific_type}'" + (f" (same as earlier '{g_type}' links of '{source_name}')." if reused else "."))
+            link["connector_types"][index] = specific_type
+        else:
+            log(f"INFO: Could not refine '{g_type}', keeping the generic type.")
+            if specific_type and specific_type.lower() != 'none':
+                link["refinement_hints"][index] = f"Invalid specific connector '{specific_type}' for generic '{g_type}'."
+        if state.refinement_done(link):
+            self._submit_link_security(queue, state, link)
+
+    def _refine_connector_type(self, source_name, target_name, g_type, file_contents):
+        """Asks for the specific type of a generic connector type. Returns (answer, reused). The specific type
+        usually follows from the source's client library rather than from the target, so the answer is shared by
+        all links of the source with this generic type, unless g_type is listed in target_specific_refinement."""
+        if g_type in self.target_specific_refinement:
+            return self._ask_connector_type(source_name, target_name, g_type, file_contents), False
+        key = (source_name, g_type)
+        with self._refinement_lock:
+            key_lock = self._refinement_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key in self._refinements:
+                return self._refinements[key], True
+            self._refinements[key] = self._ask_connector_type(source_name, target_name, g_type, file_contents)
+            return self._refinements[key], False
+
+    def _ask_connector_type(self, source_name, target_name, g_type, file_contents):
+        specific_list = knowledge_base.CONNECTOR_STEREOTYPE_HIERARCHY_MAP[g_type]
+        specific_names = [s['name'] for s in specific_list]
+        with llm_tracer.context(stage="link refinement", component=source_name, target=target_name, category=g_type):
+            expl_prompt = prompt_builder.build_specific_stereotype_prompt(
+                source_name, file_contents, g_type, f"This link is a '{g_type}'.", specific_list,
+                subject=f"{source_name} -> {target_name}"
+            )
+            specific_explanation = get_explanation(expl_prompt)
+            sel_prompt = prompt_builder.build_single_selection_prompt(specific_explanation, specific_names, f"Specific type for {g_type}")
+            return select_stereotype_from_explanation(sel_prompt, choices=specific_names)
+
+    def _submit_link_security(self, queue, state, link):
+        """Schedules the security analysis of a link once its connector types are final."""
+        state.log(f"--- Analyzing Security for link '{state.source_name}' -> '{link['target_name']}' ---")
+        if self.batch_security:
+            self._submit_link_unit(queue, state, self._select_link_security_batch, queue, state, link)
+            return
+        self._submit_link_categories(queue, state, link, knowledge_base.SECURITY_CONNECTOR_ANNOTATIONS)
+
+    def _submit_link_categories(self, queue, state, link, categories):
+        if self.link_concurrency > 1:
+            for category_name, category_list in categories.items():
+                self._submit_link_unit(queue, state, self._select_link_security, state, link, category_name, category_list)
+            return
+        # A single worker runs these units in submission order: first all explanation prompts of the link, which
+        # share the source's context prefix, then the selection prompts, as in _analyze_component.
+        for category_name, category_list in categories.items():
+            self._submit_link_unit(queue, state, self._explain_link_security, state, link, category_name, category_list)
+        for category_name, category_list in categories.items():
+            self._submit_link_unit(queue, state, self._choose_link_security, state, link, category_name, category_list)
+
+    def _select_link_security_batch(self, queue, state, link):
+        with llm_tracer.context(stage="link security", component=state.source_name, target=link["target_name"], category="batch"):
+            prompt = prompt_builder.build_batched_link_security_prompt(
+                state.source_name, link["target_name"], link["connector_types"], state.file_contents,
+                knowledge_base.SECURITY_CONNECTOR_ANNOTATIONS
+            )
+            link["annotations"].update(self._select_security_batch(prompt, knowledge_base.SECURITY_CONNECTOR_ANNOTATIONS, state.log))
+        missing = {c: l for c, l in knowledge_base.SECURITY_CONNECTOR_ANNOTATIONS.items() if c not in link["annotations"]}
+        if missing:
+            self._submit_link_categories(queue, state, link, missing)
+
+    def _select_link_security(self, state, link, category_name, category_list):
+        self._explain_link_security(state, link, category_name, category_list)
+        self._choose_link_security(state, link, category_name, category_list)
+
+    def _explain_link_security(self, state, link, category_name, category_list):
+        source_name, target_name, log = state.source_name, link["target_name"], state.log
+        with llm_tracer.context(stage="link security", component=source_name, target=target_name, category=category_name):
+            prompt = prompt_builder.build_link_security_explanation_prompt(
+                source_name, target_name, link["connector_types"], state.file_contents, category_name, category_list
+            )
+            security_explanation = get_explanation(prompt)
+            self._log_explanation(log, f"Link Security - {category_name}", security_explanation)
+            link["explanations"][category_name] = security_explanation
+
+    def _choose_link_security(self, state, link, category_name, category_list):
+        item_names = [item['name'] for item in category_list]
+        with llm_tracer.context(stage="link security", component=state.source_name, target=link["target_name"], category=category_name):
+            prompt = prompt_builder.build_single_selection_prompt(link["explanations"].pop(category_name), item_names, category_name)
+            link["annotations"][category_name] = select_stereotype_from_explanation(prompt, choices=item_names)
@@ -0,0 +1,163 @@
+import re
+from . import knowledge_base
+
+# Static classification is opt-in; None always asks the LLM for the component type.
+DEFAULT_CONFIDENCE_THRESHOLD = None
+
+IMAGE_WEIGHT = 0.9
+MANIFEST_WEIGHT = 0.8
+NAME_WEIGHT = 0.6
+ENV_WEIGHT = 0.5
+PORT_WEIGHT = 0.4
+
+# Evidence per stereotype name from knowledge_base. Images are matched against the repository name of the image
+# (its last path segment without tag), which must equal an entry or extend it only by a version or edition (e.g.
+# "postgres", "mysql-server", "zipkin-slim"); entries containing '/' must match the end of the image path. Service
+# names are matched like repository names. Ports are container ports; env are variable-name prefixes; manifests are
+# substrings of dependency manifests such as pom.xml or package.json.
+SIGNATURES = {
+    "postgresql_db": {"images": ["postgres", "postgresql", "postgis"], "ports": [5432], "env": ["POSTGRES_", "PGDATA"]},
+    "mysql_db": {"images": ["mysql", "mariadb"], "ports": [3306], "env": ["MYSQL_", "MARIADB_"]},
+    "sql_server": {"images": ["mssql", "sqlserver", "mssql/server"], "ports": [1433], "env": ["MSSQL_", "SA_PASSWORD"]},
+    "mongo_db": {"images": ["mongo", "mongodb"], "ports": [27017], "env": ["MONGO_INITDB_"]},
+    "redis_db": {"images": ["redis"], "ports": [6379], "env": ["REDIS_"]},
+    "memcached_db": {"images": ["memcached"], "ports": [11211], "env": []},
+    "elastic_search_store": {"images": ["elasticsearch", "opensearch"], "ports": [9200, 9300], "env": ["ES_JAVA_OPTS", "ELASTIC_"]},
+    "ldap_store": {"images": ["openldap", "ldap"], "ports": [389, 636], "env": ["LDAP_"]},
+    "event_store": {"images": ["eventstore", "eventstoredb"], "ports": [2113], "env": ["EVENTSTORE_"]},
+    "message_broker": {"images": ["rabbitmq", "kafka", "cp-kafka", "activemq", "artemis", "nats", "redpanda", "pulsar"],
+                       "ports": [5672, 15672, 9092, 61616, 4222], "env": ["RABBITMQ_", "KAFKA_", "ACTIVEMQ_", "ARTEMIS_"]},
+    "tracing_component": {"images": ["jaeger", "zipkin", "tempo", "jaegertracing/all-in-one", "openzipkin/zipkin"],
+                          "ports": [16686, 14268, 9411], "env": ["COLLECTOR_", "SPAN_STORAGE_TYPE"]},
+    "monitoring_data_provider": {"images": ["prometheus"], "ports": [9090], "env": []},
+    "monitoring_dashboard": {"images": ["grafana", "kibana"], "ports": [5601], "env": ["GF_"]},
+    "logging_component": {"images": ["fluentd", "fluent", "logstash", "graylog", "loki"], "ports": [24224, 5044, 12201], "env": ["FLUENTD_"]},
+    "load_balancer": {"images": ["haproxy", "traefik"], "ports": [], "env": ["TRAEFIK_"]},
+    "api_gateway": {"images": ["kong", "zuul", "krakend", "tyk"], "ports": [], "env": ["KONG_"],
+                    "manifests": ["spring-cloud-starter-gateway", "spring-cloud-starter-netflix-zuul", "ocelot"]},
+    "configuration_service": {"images": ["consul", "eureka", "zookeeper"], "ports": [8500, 8761, 2181], "env": ["ZOO_"],
+                              "manifests": ["spring-cloud-starter-netflix-eureka-server"]},
+}
+
+_WORD_SPLIT = re.compile(r"[\-_.]+")
+# Suffix words that only name a version or an edition of the same product.
+EDITION_WORDS = {"server", "community", "oss", "enterprise", "ce", "ee", "alpine", "slim", "stack", "edge", "latest", "db"}
+# Words of companion tools that are named after the product they serve, e.g. "redis_exporter" or "kafka-ui".
+TOOL_WORDS = {"exporter", "ui", "commander", "express", "admin", "promtail", "manager", "dashboard", "cli", "client", "proxy"}
+
+def _stereotype_location(name):
+    """Returns (generic, specific) for a stereotype name from the knowledge base."""
+    generic_names = {s['name'] for s in knowledge_base.COMPONENT_GENERIC_STEREOTYPE_LIST}
+    if name in generic_names:
+        return name, None
+    for generic, specific_list in knowledge_base.COMPONENT_STEREOTYPE_HIERARCHY_MAP.items():
+        if name in {s['name'] for s in specific_list}:
+            return generic, name
+    raise ValueError(f"Static signature for unknown stereotype '{name}'.")
+
+_LOCATIONS = {name: _stereotype_location(name) for name in SIGNATURES}
+
+def generic_stereotype_of(name):
+    """Returns the generic stereotype a (generic or specific) component stereotype belongs to, or None."""
+    try:
+        return _stereotype_location(name)[0]
+    except ValueError:
+        return None
+
+def _image_path(image):
+    """The image reference without registry host, tag and digest, e.g. "jaegertracing/all-in-one"."""
+    path = str(image or "").lower().split('@')[0]
+    parts = path.split('/')
+    parts[-1] = parts[-1].split(':')[0]
+    if len(parts) > 1 and ('.' in parts[0] or ':' in parts[0] or parts[0] == "localhost"):
+        parts = parts[1:]
+    return "/".join(p for p in parts if p)
+
+def _matches_name(name, entries):
+    """True if a repository or service name is one of entries, optionally followed by version or edition words."""
+    words = [w for w in _WORD_SPLIT.split(name) if w]
+    if not words or any(w in TOOL_WORDS for w in words):
+        return False
+    for entry in entries:
+        if '/' in entry:
+            continue
+        entry_words = _WORD_SPLIT.split(entry)
+        suffix = words[len(entry_words):]
+        if words[:len(entry_words)] == entry_words and all(w in EDITION_WORDS or w[0].isdigit() for w in suffix):
+            return True
+    return False
+
+def _matches_image(path, entries):
+    if not path:
+        return False
+    if any('/' in entry and (path == entry or path.endswith('/' + entry)) for entry in entries):
+        return True
+    return _matches_name(path.split('/')[-1], entries)
+
+def _container_ports(service_info):
+    ports = set()
+    for entry in service_info.get('ports', []) or []:
+        if isinstance(entry, dict):
+            target = entry.get('target')
+        else:
+            target = str(entry).split('/')[0].split(':')[-1]
+        try:
+            ports.add(int(str(target).split('-')[0]))
+        except (TypeError, ValueError):
+            continue
+    for entry in service_info.get('expose', []) or []:
+        try:
+            ports.add(int(str(entry).split('/')[0]))
+        except ValueError:
+            continue
+    return ports
+
+def _environment_names(service_info):
+    environment = service_info.get('environment', {}) or {}
+    if isinstance(environment, dict):
+        return [str(k).upper() for k in environment]
+    return [str(e).split('=', 1)[0].upper() for e in environment]
+
+def classify(component_name, service_info, manifest_texts=()):
+    """Assigns a stereotype from compose metadata and dependency manifests alone.
+    Returns {"generic", "specific", "stereotype", "confidence", "evidence"} for the best candidate, or None."""
+    image_path = _image_path(service_info.get('image', ''))
+    service_name = str(component_name).lower()
+    ports = _container_ports(service_info)
+    env_names = _environment_names(service_info)
+    manifests = "\n".join(manifest_texts).lower()
+    # Services built from source usually only reference infrastructure through their name, ports and
+    # variables (e.g. "kafka-consumer" with KAFKA_BROKERS), so for them only the image and manifests count.
+    built_from_source = 'build' in service_info
+    best = None
+    for stereotype, signature in SIGNATURES.items():
+        evidence = []
+        if _matches_image(image_path, signature["images"]):
+            evidence.append(("image", IMAGE_WEIGHT))
+        if not built_from_source:
+            if _matches_name(service_name, signature["images"]):
+                evidence.append(("service name", NAME_WEIGHT))
+            matched_ports = ports & set(signature["ports"])
+            if matched_ports:
+                evidence.append((f"ports {sorted(matched_ports)}", PORT_WEIGHT))
+            if any(env.startswith(prefix) for env in env_names for prefix in signature["env"]):
+                evidence.append(("environment", ENV_WEIGHT))
+        if manifests and any(m in manifests for m in signature.get("manifests", [])):
+            evidence.append(("dependency manifest", MANIFEST_WEIGHT))
+        if not evidence:
+            continue
+        # Independent pieces of evidence combine like probabilities: 1 - prod(1 - w).
+        doubt = 1.0
+        for _, weight in evidence:
+            doubt *= 1.0 - weight
+        confidence = 1.0 - doubt
+        if best is None or confidence > best["confidence"]:
+            generic, specific = _LOCATIONS[stereotype]
+            best = {
+                "generic": generic,
+                "specific": specific,
+                "stereotype": specific or generic,
+                "confidence": confidence,
+                "evidence": [label for label, _ in evidence],
+            }
+    return best
@@ -0,0 +1,108 @@
+import re
+
+# Generic connector types suggested by the scheme of a connection string.
+SCHEME_CONNECTOR_TYPES = {
+    "postgres": ["database_connector"], "postgresql": ["database_connector"], "jdbc": ["database_connector"],
+    "mysql": ["database_connector"], "mariadb": ["database_connector"], "sqlserver": ["database_connector"],
+    "mssql": ["database_connector"], "mongodb": ["database_connector"], "mongodb+srv": ["database_connector"],
+    "redis": ["database_connector"], "rediss": ["database_connector"],
+    "amqp": ["messaging"], "amqps": ["messaging"], "kafka": ["messaging"], "nats": ["messaging"],
+    "stomp": ["messaging"], "mqtt": ["messaging"],
+    "http": ["service_connector", "web_connector"], "https": ["service_connector", "web_connector"],
+    "ws": ["web_connector"], "wss": ["web_connector"], "grpc": ["service_connector"],
+    "ldap": ["ldap"], "ldaps": ["ldap"], "memcached": ["memcached_connector"],
+}
+
+# Generic connector types suggested by the (statically classified) generic type of the target.
+TARGET_CONNECTOR_TYPES = {
+    "database": ["database_connector"],
+    "message_broker": ["messaging"],
+    "service": ["service_connector"],
+    "facade": ["service_connector", "web_connector"],
+}
+
+HOST_KEY_SUFFIXES = ("HOST", "HOSTNAME", "ADDR", "ADDRESS", "SERVER", "SERVERS", "URL", "URI", "ENDPOINT",
+                     "BROKER", "BROKERS", "SERVICE", "DSN")
+
+def _as_list(value):
+    if isinstance(value, dict):
+        return list(value.keys())
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return []
+
+def _environment_items(service_info):
+    environment = service_info.get('environment', {}) or {}
+    if isinstance(environment, dict):
+        return [(str(k), "" if v is None else str(v)) for k, v in environment.items()]
+    items = []
+    for entry in environment:
+        key, _, value = str(entry).partition('=')
+        items.append((key, value))
+    return items
+
+def _networks(service_info):
+    """Networks the service joins, or None when reachability cannot be decided (e.g. network_mode: host)."""
+    if 'network_mode' in service_info:
+        return None
+    return set(_as_list(service_info.get('networks'))) or {"default"}
+
+def _reference_patterns(target_name):
+    name = re.escape(target_name)
+    boundary = r"(?=[:/'\"\s,;)\]}]|$)"
+    return {
+        "url": re.compile(r"([a-z][a-z0-9+.\-]*)://(?:[^\s/@'\"]*@)?" + name + boundary, re.IGNORECASE),
+        "host_port": re.compile(r"(?<![\w.\-])" + name + r":\d{2,5}\b", re.IGNORECASE),
+        "host_setting": re.compile(r"(?:host|hostname|server|address|addr|broker|endpoint)s?['\"]?\s*[=:]\s*['\"]?"
+                                   + name + boundary, re.IGNORECASE),
+    }
+
+def _scan_text(text, patterns):
+    """Returns (found, schemes) for the target's references in text."""
+    schemes = [m.group(1).lower() for m in patterns["url"].finditer(text)]
+    found = bool(schemes) or bool(patterns["host_port"].search(text)) or bool(patterns["host_setting"].search(text))
+    return found, schemes
+
+def discover_candidates(source_name, services, component_list, source_text="", target_types=None):
+    """Builds the candidate outgoing links of source_name from the compose topology and its source files.
+    Returns {target: {"evidence": [...], "connector_types": [...]}} in component_list order."""
+    target_types = target_types or {}
+    service_info = services.get(source_name) or {}
+    depends_on = set(_as_list(service_info.get('depends_on')))
+    compose_links = {str(link).split(':')[0] for link in _as_list(service_info.get('links'))}
+    environment = _environment_items(service_info)
+    source_networks = _networks(service_info)
+    candidates = {}
+    for target_name in component_list:
+        if target_name == source_name:
+            continue
+        evidence = []
+        connector_types = []
+        if target_name in depends_on:
+            evidence.append("depends_on")
+        if target_name in compose_links:
+            evidence.append("links")
+        patterns = _reference_patterns(target_name)
+        for key, value in environment:
+            found, schemes = _scan_text(value, patterns)
+            if found or (value == target_name and key.upper().endswith(HOST_KEY_SUFFIXES)):
+                evidence.append(f"environment {key}")
+                for scheme in schemes:
+                    connector_types.extend(SCHEME_CONNECTOR_TYPES.get(scheme, []))
+        if source_text:
+            found, schemes = _scan_text(source_text, patterns)
+            if found:
+                evidence.append("source reference")
+                for scheme in schemes:
+                    connector_types.extend(SCHEME_CONNECTOR_TYPES.get(scheme, []))
+        if not evidence:
+            continue
+        target_networks = _networks(services.get(target_name) or {})
+        if source_networks is not None and target_networks is not None and not source_networks & target_networks:
+            continue
+        connector_types.extend(TARGET_CONNECTOR_TYPES.get(target_types.get(target_name), []))
+        candidates[target_name] = {
+            "evidence": list(dict.fromkeys(evidence)),
+            "connector_types": list(dict.fromkeys(connector_types)),
+        }
+    return candidates
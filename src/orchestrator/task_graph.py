@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class TaskGraph:
+    """A small DAG of tasks. Each task is called with the results of all tasks finished so far
+    and becomes ready once its dependencies are done; ready tasks run concurrently."""
+
+    def __init__(self):
+        self._tasks = {}
+
+    def add(self, name, fn, deps=()):
+        if name in self._tasks:
+            raise ValueError(f"Task '{name}' is already defined.")
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'.")
+        self._tasks[name] = (fn, tuple(deps))
+        return name
+
+    def _ready(self, results, started):
+        return [name for name, (_, deps) in self._tasks.items()
+                if name not in started and all(dep in results for dep in deps)]
+
+    def run(self, max_workers=1) -> dict:
+        results = {}
+        if max_workers <= 1:
+            # Tasks can only depend on tasks added before them, so insertion order is topological.
+            for name, (fn, _) in self._tasks.items():
+                results[name] = fn(results)
+            return results
+        started = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while len(results) < len(self._tasks):
+                for name in self._ready(results, started):
+                    started.add(name)
+                    running[executor.submit(self._tasks[name][0], dict(results))] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        for pending in running:
+                            pending.cancel()
+                        raise
+        return results
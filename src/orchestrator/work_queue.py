@@ -0,0 +1,70 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class WorkQueue:
+    """Runs work items with at most max_workers in flight. Unlike TaskGraph, the work is not known up front:
+    a running item may submit follow-up items. join() waits until no work is left and re-raises the first failure.
+    With a single worker, items run in the calling thread and follow-ups run right after the item that submitted
+    them, i.e. in the same depth-first order as plain nested calls."""
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self._pending = deque()
+        self._submitted = None
+        self._executor = None
+        self._condition = threading.Condition()
+        self._outstanding = 0
+        self._error = None
+
+    def submit(self, fn, *args):
+        if self.max_workers <= 1:
+            item = (fn, args)
+            if self._submitted is not None:
+                self._submitted.append(item)
+            else:
+                self._pending.append(item)
+            return
+        with self._condition:
+            if self._error is not None:
+                return
+            self._outstanding += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._executor.submit(self._run, fn, args)
+
+    def _run(self, fn, args):
+        try:
+            with self._condition:
+                failed = self._error is not None
+            if not failed:
+                fn(*args)
+        except BaseException as e:
+            with self._condition:
+                if self._error is None:
+                    self._error = e
+        finally:
+            with self._condition:
+                self._outstanding -= 1
+                self._condition.notify_all()
+
+    def join(self):
+        if self.max_workers <= 1:
+            while self._pending:
+                fn, args = self._pending.popleft()
+                self._submitted = []
+                try:
+                    fn(*args)
+                finally:
+                    self._pending.extendleft(reversed(self._submitted))
+                    self._submitted = None
+            return
+        with self._condition:
+            while self._outstanding:
+                self._condition.wait()
+            error = self._error
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if error is not None:
+            raise error
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of choice extraction from selection answers: the old per-call alternation regex against the
+cached ChoiceMatcher used by the agent.
+
+Usage:
+
+    python -m src.run.benchmark_choice_matcher [repetitions]
+
+For every choice list of the knowledge base it times both extractors over answers of increasing size, which end
+with the chosen name after a long explanation, and reports microseconds per call.
+"""
+import random
+import re
+import sys
+import timeit
+from src.agent.choice_matcher import matcher_for
+from src.orchestrator import knowledge_base
+
+ANSWER_SIZES = [40, 400, 4000, 40000]
+
+
+def legacy_extract(text, choices):
+    pattern = r"\b(" + "|".join(re.escape(choice) for choice in choices) + r")\b"
+    match = re.search(pattern, text)
+    return match.group(1) if match else None
+
+
+def cached_extract(text, choices):
+    return matcher_for(tuple(choices)).search(text)[1]
+
+
+def choice_lists():
+    yield "component generic", [s['name'] for s in knowledge_base.COMPONENT_GENERIC_STEREOTYPE_LIST]
+    yield "connector generic", [s['name'] for s in knowledge_base.CONNECTOR_GENERIC_STEREOTYPE_LIST]
+    largest = max(knowledge_base.CONNECTOR_STEREOTYPE_HIERARCHY_MAP.items(), key=lambda item: len(item[1]))
+    yield f"connector {largest[0]}", [s['name'] for s in largest[1]]
+    for category, items in knowledge_base.SECURITY_COMPONENT_ANNOTATIONS.items():
+        yield f"security {category}", [s['name'] for s in items]
+        break
+
+
+def build_answer(size, choices, rng):
+    """A rambling explanation made of knowledge-base descriptions, ending with a chosen name."""
+    descriptions = [s['description'] for s in knowledge_base.COMPONENT_GENERIC_STEREOTYPE_LIST]
+    words = []
+    while sum(len(w) + 1 for w in words) < size:
+        words.extend(rng.choice(descriptions).split())
+    chosen = rng.choice(choices)
+    return " ".join(words)[:size] + f" so the answer is {chosen}."
+
+
+def main(argv):
+    repetitions = int(argv[1]) if len(argv) > 1 else 200
+    rng = random.Random(0)
+    print(f"{'choice list':<42}{'chars':>8}{'legacy us':>12}{'cached us':>12}{'speedup':>9}")
+    for label, choices in choice_lists():
+        for size in ANSWER_SIZES:
+            text = build_answer(size, choices, rng)
+            legacy = timeit.timeit(lambda: legacy_extract(text, choices), number=repetitions) / repetitions * 1e6
+            cached = timeit.timeit(lambda: cached_extract(text, choices), number=repetitions) / repetitions * 1e6
+            print(f"{label:<42}{len(text):>8}{legacy:>12.1f}{cached:>12.1f}{legacy / cached:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
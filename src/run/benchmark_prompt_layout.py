@@ -0,0 +1,113 @@
+"""
+Compares Ollama prompt evaluation for one component's security questions with the old prompt layout
+(question first, file contents last) and the prefix-stable layout of prompt_builder (file contents first).
+
+Usage (needs a running Ollama with the model pulled):
+
+    python -m src.run.benchmark_prompt_layout <project_path> <component_name> [stereotype]
+
+Every run sends the SECURITY_COMPONENT_ANNOTATIONS explanation prompts and their selection prompts (on the selection
+model and format) as a sequential scan does, bypassing the response cache:
+
+- legacy layout, each explanation followed by its selection (the old scan order)
+- prefix-stable layout in the same interleaved order, where every selection prompt replaces the cached prefix
+- prefix-stable layout with all explanations before the selections (the order of a sequential scan)
+
+It reports the prompt tokens Ollama actually evaluated and the prompt-eval time it reported.
+"""
+import os
+import sys
+import time
+import yaml
+from src.agent import agent
+from src.agent.client_pool import client_pool
+from src.agent.model_router import model_router
+from src.orchestrator import knowledge_base, prompt_builder
+from src.orchestrator.scanner_orchestrator import ScannerOrchestrator
+
+
+def build_legacy_security_explanation_prompt(component_name, stereotype, file_contents, category_name, category_list):
+    annotations_with_desc = "\n".join([f"- {item['name']}: {item['description']}" for item in category_list])
+    return f"""
+            You are analyzing the '{component_name}' component, which has been identified as a '{stereotype}'.
+            Focus ONLY on the security category: '{category_name}'.
+            Based on the file contents, explain which ONE of the following annotations best applies. If none seem relevant, state that clearly.
+
+            Available Annotations for this category:
+            {annotations_with_desc}
+
+            File Contents:
+            {file_contents}
+            """
+
+
+def send(rows, label, prompt, model, format=None):
+    start = time.perf_counter()
+    response = client_pool.invoke(prompt, model=model, format=format)
+    wall = time.perf_counter() - start
+    metadata = getattr(response, "response_metadata", {}) or {}
+    rows.append({
+        "label": label,
+        "prompt_chars": len(prompt),
+        "prompt_eval_count": metadata.get("prompt_eval_count") or 0,
+        "prompt_eval_s": (metadata.get("prompt_eval_duration") or 0) / 1e9,
+        "wall_s": wall,
+    })
+    return response.content
+
+
+def select(rows, category_name, category_list, explanation):
+    item_names = [item['name'] for item in category_list]
+    prompt = prompt_builder.build_single_selection_prompt(explanation, item_names, category_name)
+    format = agent._choice_schema(item_names) if agent._constrained_selection() else None
+    send(rows, f"selection: {category_name}", prompt, model_router.model_for("selection"), format)
+
+
+def run_layout(name, build_prompt, explanations_first, component_name, stereotype, file_contents):
+    rows = []
+    categories = knowledge_base.SECURITY_COMPONENT_ANNOTATIONS
+    explanations = {}
+    for category_name, category_list in categories.items():
+        prompt = build_prompt(component_name, stereotype, file_contents, category_name, category_list)
+        explanations[category_name] = send(rows, category_name, prompt, model_router.model_for("explanation"))
+        if not explanations_first:
+            select(rows, category_name, category_list, explanations[category_name])
+    if explanations_first:
+        for category_name, category_list in categories.items():
+            select(rows, category_name, category_list, explanations[category_name])
+    print(f"\n=== {name} ===")
+    print(f"{'prompt':<52}{'chars':>8}{'evaluated tokens':>18}{'prompt eval s':>15}{'wall s':>9}")
+    for row in rows:
+        print(f"{row['label'][:51]:<52}{row['prompt_chars']:>8}{row['prompt_eval_count']:>18}"
+              f"{row['prompt_eval_s']:>15.2f}{row['wall_s']:>9.2f}")
+    total_eval = sum(r["prompt_eval_s"] for r in rows)
+    total_tokens = sum(r["prompt_eval_count"] for r in rows)
+    print(f"{'TOTAL':<60}{total_tokens:>18}{total_eval:>15.2f}{sum(r['wall_s'] for r in rows):>9.2f}")
+    return total_eval
+
+
+def main(argv):
+    if len(argv) < 3:
+        print(__doc__)
+        return 1
+    project_path, component_name = argv[1], argv[2]
+    stereotype = argv[3] if len(argv) > 3 else "service"
+    with open(os.path.join(project_path, 'docker-compose.yaml'), 'r') as f:
+        services = yaml.safe_load(f).get('services', {})
+    orchestrator = ScannerOrchestrator(project_path, print)
+    file_contents = orchestrator._get_file_contents(component_name, services.get(component_name, {}))
+    # Load the model once so no run pays for it.
+    client_pool.invoke("Reply with OK.", model=model_router.model_for("explanation"))
+    before = run_layout("question first (legacy layout), interleaved", build_legacy_security_explanation_prompt, False,
+                        component_name, stereotype, file_contents)
+    interleaved = run_layout("component context first, interleaved", prompt_builder.build_security_explanation_prompt,
+                             False, component_name, stereotype, file_contents)
+    after = run_layout("component context first, explanations before selections (scan order)",
+                       prompt_builder.build_security_explanation_prompt, True, component_name, stereotype, file_contents)
+    print(f"\nPrompt evaluation time: legacy {before:.2f}s, prefix-stable interleaved {interleaved:.2f}s, "
+          f"scan order {after:.2f}s" + (f" ({before / after:.1f}x)" if after else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
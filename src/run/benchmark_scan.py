@@ -0,0 +1,73 @@
+"""
+End-to-end load test of ScannerOrchestrator.run_scan without Ollama: every LLM call is answered by the synthetic
+stub backend or replayed from a trace recorded with LLM_RECORD_PATH, so it runs offline, e.g. on CI machines.
+
+Usage:
+
+    python -m src.run.benchmark_scan <project_path> [--runs 3] [--latency 0.05] [--replay trace.jsonl [--speed 0]]
+                                     [--max-concurrency 1] [--task-concurrency 1] [--link-concurrency 1]
+
+Each run is a full scan with the response cache disabled, writing to a temporary directory. For every run it
+reports the wall time, the LLM calls and their summed latency. With --latency 0 (or a replay at --speed 0) the wall
+time is the scan's own overhead: file ingestion, prompt building, parsing and scheduling.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m src.run.benchmark_scan", description="Load-test a scan offline.")
+    parser.add_argument("project", help="project folder containing a docker-compose.yaml")
+    parser.add_argument("--runs", type=int, default=3, help="scans to run (default: 3)")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per stubbed LLM call (default: 0.05)")
+    parser.add_argument("--replay", help="answer from this recorded trace instead of the stub")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up of the recorded latencies; 0 = instant")
+    parser.add_argument("--max-concurrency", type=int, default=1)
+    parser.add_argument("--task-concurrency", type=int, default=1)
+    parser.add_argument("--link-concurrency", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    # Read by the response cache on first use; every run must reach the backend.
+    os.environ["LLM_CACHE_PATH"] = ""
+    from src.agent.llm_backend import llm_backend, ReplayBackend, StubBackend
+    from src.orchestrator.scanner_orchestrator import ScannerOrchestrator
+    llm_backend.use(ReplayBackend(args.replay, speed=args.speed) if args.replay else StubBackend(latency=args.latency))
+    errors = []
+
+    def log(message):
+        if "ERROR" in message:
+            errors.append(message.strip())
+
+    print(f"{'run':>4}{'wall s':>10}{'calls':>8}{'LLM s':>10}{'calls/s':>10}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for run in range(1, args.runs + 1):
+            orchestrator = ScannerOrchestrator(
+                args.project, log, output_path=os.path.join(output_dir, "discovered_components.json"),
+                max_concurrency=args.max_concurrency, task_concurrency=args.task_concurrency,
+                link_concurrency=args.link_concurrency,
+            )
+            start = time.perf_counter()
+            # The agent prints a line per LLM call.
+            with contextlib.redirect_stdout(io.StringIO()):
+                completed = orchestrator.run_scan()
+            wall = time.perf_counter() - start
+            stats = llm_backend.summary()
+            print(f"{run:>4}{wall:>10.2f}{stats['calls']:>8}{stats['total_latency']:>10.2f}{stats['calls'] / wall:>10.1f}")
+            if not completed:
+                print("\n".join(errors))
+                return 1
+    if "replay_misses" in stats:
+        print(f"Prompts missing from the trace in the last run: {stats['replay_misses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,4 +1,3 @@
-from output.discovered_model import discoverd_model
 from src.detectors.component_model_detectors import ComponentModelDetector
 from src.run.ground_truth import secure_connections_values, backend_authentication_values, \
     authentication_on_client_service_paths_values, backend_authorization_values, \
@@ -6,8 +5,12 @@ from src.run.ground_truth import secure_connections_values, backend_authenticati
     sensitive_data_values
 
 
-def calculate_all_metrics():
-    model_bundles = [discoverd_model]
+def calculate_all_metrics(model_bundle=None):
+    # Without a bundle, the model of the GUI's scan output is built from output/discovered_components.json.
+    if model_bundle is None:
+        from src.orchestrator.model_loader import load_model_from_json
+        model_bundle = load_model_from_json("output/discovered_components.json")
+    model_bundles = [model_bundle]
     model_names = ["DM"]
 
     detectors = []
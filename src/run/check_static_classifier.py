@@ -0,0 +1,57 @@
+"""
+Regression check of the static component classifier against well-known images, including companion tools
+(exporters, admin UIs) that are named after the product they serve and must not be classified as that product.
+
+Usage:
+
+    python -m src.run.check_static_classifier [threshold]
+
+Every case is classified as an image-based compose service of that name; a case passes if the stereotype reaching
+the threshold (default 0.8) is the expected one, or if no stereotype reaches it where none is expected. Exits
+with status 1 if any case fails.
+"""
+import sys
+from src.orchestrator import static_classifier
+
+# (service name, compose service, expected stereotype or None)
+CASES = [
+    ("db", {"image": "postgres:16-alpine"}, "postgresql_db"),
+    ("db", {"image": "docker.io/library/mysql:8"}, "mysql_db"),
+    ("db", {"image": "mysql/mysql-server:8.0"}, "mysql_db"),
+    ("db", {"image": "mcr.microsoft.com/mssql/server:2022-latest"}, "sql_server"),
+    ("cache", {"image": "redis:7"}, "redis_db"),
+    ("store", {"image": "mongo:6"}, "mongo_db"),
+    ("broker", {"image": "rabbitmq:3-management"}, "message_broker"),
+    ("broker", {"image": "bitnami/kafka:3.6"}, "message_broker"),
+    ("broker", {"image": "confluentinc/cp-kafka:7.5.0"}, "message_broker"),
+    ("tracing", {"image": "jaegertracing/all-in-one:1.50"}, "tracing_component"),
+    ("tracing", {"image": "openzipkin/zipkin"}, "tracing_component"),
+    ("tracing", {"image": "openzipkin/zipkin-slim:2"}, "tracing_component"),
+    ("metrics", {"image": "prom/prometheus"}, "monitoring_data_provider"),
+    ("dashboards", {"image": "grafana/grafana:10.2.0"}, "monitoring_dashboard"),
+    ("logs", {"image": "grafana/loki:2.9.0"}, "logging_component"),
+    ("mongo-express", {"image": "mongo-express"}, None),
+    ("redis-commander", {"image": "rediscommander/redis-commander", "environment": {"REDIS_HOSTS": "local:redis:6379"}}, None),
+    ("redis-exporter", {"image": "oliver006/redis_exporter", "ports": ["9121:9121"]}, None),
+    ("postgres-exporter", {"image": "prometheuscommunity/postgres-exporter"}, None),
+    ("kafka-ui", {"image": "provectuslabs/kafka-ui", "environment": {"KAFKA_CLUSTERS_0_NAME": "local"}}, None),
+    ("promtail", {"image": "grafana/promtail:2.9.0"}, None),
+]
+
+
+def main(argv):
+    threshold = float(argv[1]) if len(argv) > 1 else 0.8
+    failures = 0
+    for component_name, service_info, expected in CASES:
+        result = static_classifier.classify(component_name, service_info)
+        actual = result["stereotype"] if result and result["confidence"] >= threshold else None
+        confidence = f"{result['confidence']:.2f}" if result else "-"
+        status = "ok" if actual == expected else "FAIL"
+        failures += actual != expected
+        print(f"{status:<6}{service_info['image']:<48}{str(actual):<28}{confidence:>6}  (expected {expected})")
+    print(f"\n{len(CASES) - failures} of {len(CASES)} cases passed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
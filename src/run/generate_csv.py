@@ -1,10 +1,7 @@
 import os
-from src.run.calculate_metrics import calculate_all_metrics
 from src.run.ground_truth import authorization_on_client_service_paths_values, backend_authorization_values, \
     api_gateways_bffs_for_traffic_control_values, sensitive_data_values
 
-calculate_all_metrics()
-
 def generate_csv(models_dict):
     text = ""
     first = True
@@ -38,10 +35,10 @@ def write_csv(models_dict, file_name, directory="output/stats"):
     with open(full_path, "w", encoding='utf-8') as file:
         file.write(generate_csv(models_dict))
 
-def write_csv_all():
-    write_csv(authorization_on_client_service_paths_values, "authorization_on_client_service_paths.csv")
-    write_csv(backend_authorization_values, "backend_authorization.csv")
-    write_csv(api_gateways_bffs_for_traffic_control_values, "api_gateways_bffs_for_traffic_control_values.csv")
-    write_csv(sensitive_data_values, "sensitive_data_values.csv")
+def write_csv_all(directory="output/stats"):
+    write_csv(authorization_on_client_service_paths_values, "authorization_on_client_service_paths.csv", directory)
+    write_csv(backend_authorization_values, "backend_authorization.csv", directory)
+    write_csv(api_gateways_bffs_for_traffic_control_values, "api_gateways_bffs_for_traffic_control_values.csv", directory)
+    write_csv(sensitive_data_values, "sensitive_data_values.csv", directory)
 
     
@@ -0,0 +1,127 @@
+"""
+Scan worker: runs the component and link analysis jobs that scans publish to a job queue, so that the LLM work of
+a large system is spread over several processes and Ollama servers.
+
+Usage (from the root directory of this repository):
+
+    python -m src.worker [--job-queue output/scan_jobs.sqlite] [--ollama-host http://gpu-2:11434] [--processes 2]
+
+A scan publishes jobs when SCAN_JOB_QUEUE (or --job-queue of src.cli) names the queue file. Start any number of
+workers on the same queue, each with its own --ollama-host if needed; the workers read the project files from the
+path the scan was started with, so they must see the same file system. Stage-1 jobs analyze one component, stage-2
+jobs analyze all outgoing links of one source. Other settings (models, cache, timeouts) are read from .env.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from dotenv import load_dotenv
+
+DEFAULT_JOB_QUEUE = "output/scan_jobs.sqlite"
+POLL_SECONDS = 0.5
+
+
+class _Lease:
+    """Renews the lease of a claimed job in the background until the job is finished."""
+
+    def __init__(self, queue, job_id, worker_id):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew, args=(queue, job_id, worker_id), daemon=True)
+
+    def _renew(self, queue, job_id, worker_id):
+        while not self._stop.wait(queue.lease_seconds / 4):
+            queue.renew(job_id, worker_id)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_job(orchestrators, job, worker_id):
+    """Runs one claimed job. Returns its output, log lines and call trace."""
+    from src.agent.llm_tracer import llm_tracer
+    from src.orchestrator.scanner_orchestrator import ScannerOrchestrator
+    payload = job["payload"]
+    # One orchestrator per scan, so that file selections, summaries and refinements are reused across its jobs.
+    key = (job["scan_id"], payload["project_path"])
+    if key not in orchestrators:
+        orchestrators.clear()
+        orchestrators[key] = ScannerOrchestrator(payload["project_path"], print, **payload["options"])
+    buffered = []
+    llm_tracer.reset()
+    print(f"[{worker_id}] Running {job['kind']} job '{job['name']}'...", flush=True)
+    output = orchestrators[key].run_job(job["kind"], job["name"], payload, buffered.append)
+    return {"output": output, "log": buffered, "trace": llm_tracer.snapshot()}
+
+
+def run_worker(job_queue_path, worker_id, idle_exit=None):
+    """Claims and runs jobs until the queue has been empty for idle_exit seconds (forever if None)."""
+    from src.orchestrator.job_queue import JobQueue
+    load_dotenv()
+    queue = JobQueue(job_queue_path)
+    orchestrators = {}
+    idle_since = time.monotonic()
+    print(f"[{worker_id}] Waiting for jobs in '{job_queue_path}'...", flush=True)
+    try:
+        while idle_exit is None or time.monotonic() - idle_since < idle_exit:
+            job = queue.claim(worker_id)
+            if job is None:
+                time.sleep(POLL_SECONDS)
+                continue
+            with _Lease(queue, job["id"], worker_id):
+                try:
+                    result = run_job(orchestrators, job, worker_id)
+                except Exception as e:
+                    traceback.print_exc()
+                    queue.fail(job["id"], worker_id, f"{type(e).__name__}: {e}")
+                else:
+                    queue.complete(job["id"], worker_id, result)
+            idle_since = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m src.worker", description="Run scan jobs published to a job queue.")
+    parser.add_argument("--job-queue", default=os.getenv("SCAN_JOB_QUEUE") or DEFAULT_JOB_QUEUE,
+                        help=f"job queue file shared with the scans (default: SCAN_JOB_QUEUE or {DEFAULT_JOB_QUEUE})")
+    parser.add_argument("--ollama-host", help="Ollama server used by this worker (default: OLLAMA_HOST or the local server)")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start (default: 1)")
+    parser.add_argument("--idle-exit", type=float,
+                        help="stop after the queue has been empty for this many seconds (default: run until interrupted)")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    load_dotenv()
+    args = parse_args(argv)
+    if args.ollama_host:
+        os.environ["OLLAMA_HOST"] = args.ollama_host
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    if args.processes <= 1:
+        run_worker(args.job_queue, prefix, args.idle_exit)
+        return 0
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(args.job_queue, f"{prefix}-{index}", args.idle_exit))
+        for index in range(1, args.processes + 1)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return 0 if all(process.exitcode == 0 for process in processes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))